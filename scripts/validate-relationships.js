@@ -1,5 +1,6 @@
 #!/usr/bin/env node
 
+const crypto = require('crypto');
 const fs = require('fs');
 const path = require('path');
 
@@ -12,6 +13,9 @@ const DOCUMENTS_DIR = path.join(__dirname, '..', 'documents');
 // Path to relationships file
 const RELATIONSHIPS_FILE = path.join(DOCUMENTS_DIR, 'relationships.mmd');
 
+// Path to the index compiled by tools/relationship_index.py
+const RELATIONSHIPS_INDEX_FILE = path.join(DOCUMENTS_DIR, 'relationships.index.json');
+
 /**
  * Reads all markdown files from a category directory and returns slugs
  */
@@ -149,34 +153,63 @@ function parseRelationships(content) {
   return relationships;
 }
 
+/**
+ * Returns the relationships of the prebuilt index, or null when it is missing or
+ * was compiled from a different relationships.mmd
+ */
+function readPrebuiltRelationships(content) {
+  if (!fs.existsSync(RELATIONSHIPS_INDEX_FILE)) {
+    return null;
+  }
+
+  const index = JSON.parse(fs.readFileSync(RELATIONSHIPS_INDEX_FILE, 'utf8'));
+  const sourceHash = crypto.createHash('sha256').update(content).digest('hex');
+  if (index.source_sha256 !== sourceHash) {
+    return null;
+  }
+
+  return index.relationships.map(([from, to, type, bidirectional, lineNumber]) => ({
+    from,
+    to,
+    type,
+    bidirectional,
+    lineNumber,
+  }));
+}
+
+/**
+ * Returns the slugs of a set that are not valid
+ */
+function unknownSlugs(slugs, validSlugs) {
+  return new Set([...slugs].filter(slug => !validSlugs.has(slug)));
+}
+
 /**
  * Validates relationships against a set of valid slugs
  */
 function validateRelationships(relationships, validSlugs) {
   const errors = [];
-  const seenErrors = new Set(); // To avoid duplicate error messages
+  const unknownSources = unknownSlugs(new Set(relationships.map(rel => rel.from)), validSlugs);
+  const unknownTargets = unknownSlugs(new Set(relationships.map(rel => rel.to)), validSlugs);
 
+  // Report each unknown slug once, at the first line that references it
   for (const rel of relationships) {
-    const errorKey = `${rel.from}|${rel.to}|${rel.lineNumber}`;
-
-    if (!validSlugs.has(rel.from) && !seenErrors.has(`from:${rel.from}`)) {
+    if (unknownSources.delete(rel.from)) {
       errors.push({
         type: 'invalid-source',
         slug: rel.from,
         lineNumber: rel.lineNumber,
         message: `Invalid source slug: "${rel.from}" (line ${rel.lineNumber})`,
       });
-      seenErrors.add(`from:${rel.from}`);
     }
 
-    if (!validSlugs.has(rel.to) && !seenErrors.has(`to:${rel.to}`)) {
+    if (unknownTargets.delete(rel.to)) {
       errors.push({
         type: 'invalid-target',
         slug: rel.to,
         lineNumber: rel.lineNumber,
         message: `Invalid target slug: "${rel.to}" (line ${rel.lineNumber})`,
       });
-      seenErrors.add(`to:${rel.to}`);
     }
   }
 
@@ -214,8 +247,13 @@ function main() {
 
   let relationships;
   try {
-    relationships = parseRelationships(content);
-    console.log(`Parsed ${relationships.length} relationships\n`);
+    relationships = readPrebuiltRelationships(content);
+    if (relationships) {
+      console.log(`Loaded ${relationships.length} relationships from ${path.basename(RELATIONSHIPS_INDEX_FILE)}\n`);
+    } else {
+      relationships = parseRelationships(content);
+      console.log(`Parsed ${relationships.length} relationships\n`);
+    }
   } catch (error) {
     console.error(`Error parsing relationships file:`, error.message);
     process.exit(1);
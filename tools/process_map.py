@@ -1,22 +1,214 @@
 import xml.etree.ElementTree as ET
 import re
 import math
+import argparse
+import base64
+import contextlib
+import copy
+import cProfile
+import functools
+import glob
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
 EXCLUDED_SHAPE_PROXIMITY_THRESHOLD = 80
 TEXT_TO_SHAPE_MAX_DISTANCE = 150
 NUMBER_TO_SHAPE_MAX_DISTANCE = 60
 
+FONT_FACE_PATTERN = re.compile(r'@font-face\s*\{[^}]*\}')
+FONT_FAMILY_PATTERN = re.compile(r'font-family:\s*["\']?([^;"\']+)')
+FONT_DATA_URI_PATTERN = re.compile(r'url\((["\']?)data:font/(?P<format>[\w.+-]+);base64,(?P<data>[A-Za-z0-9+/=\s]+)\1\)')
+
+NUMBER_PATTERN = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+TRANSFORM_STEP_PATTERN = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+IDENTITY_MATRIX = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+IDENTITY_TRANSFORM_PATTERN = re.compile(r'(?:rotate\(\s*-?0(?:\.0*)?(?:[\s,]+[^\s,)]+){0,2}\s*\)|translate\(\s*-?0(?:\.0*)?(?:[\s,]+-?0(?:\.0*)?)?\s*\))')
+ROUNDED_ATTRIBUTES = {'d', 'x', 'y', 'width', 'height', 'viewBox'}
+TEXT_CONTENT_TAGS = {'text', 'tspan', 'textPath', 'title', 'desc'}
+INHERITED_PRESENTATION_DEFAULTS = {
+    'direction': 'ltr',
+    'fill-opacity': '1',
+    'fill-rule': 'nonzero',
+    'font-style': 'normal',
+    'font-weight': 'normal',
+    'stroke-opacity': '1',
+    'stroke-width': '1',
+    'text-anchor': 'start',
+}
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / '.map_cache'
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_INCREMENTAL_DIR = DEFAULT_CACHE_DIR / 'incremental'
+DEFAULT_DOCUMENTS_DIR = Path(__file__).parent.parent / 'documents'
+WEBSITE_PUBLIC_DIR = Path(__file__).parent.parent / 'website' / 'public'
+
+PATH_COMMAND_PATTERN = re.compile(r'([MmLlHhVvCcSsQqTtAaZz])([^MmLlHhVvCcSsQqTtAaZz]*)')
+PATH_COMMAND_ARITY = {'M': 2, 'L': 2, 'T': 2, 'S': 4, 'Q': 4, 'C': 6, 'A': 7}
+DOCUMENT_CATEGORIES = {'pattern': 'patterns', 'antipattern': 'anti-patterns', 'obstacle': 'obstacles'}
+TITLE_CATEGORY_SUFFIX_PATTERN = re.compile(r'\s*\((Anti-pattern|Obstacle)\)\s*$', re.IGNORECASE)
+TITLE_LEADING_EMOJI_PATTERN = re.compile(r'^[^\w\s(]+\s+')
+FUZZY_TITLE_SEPARATOR_PATTERN = re.compile(r'[\W_]+')
+MIN_RESOLUTION_CONFIDENCE = 0.5
+OTHER_CATEGORY_PENALTY = 0.05
+DEFAULT_TILE_LEVELS = 3
+TILE_MANIFEST_NAME = 'manifest.json'
+TILE_BASE_NAME = 'base.svg'
+BASE_LAYER_TAGS = {'defs', 'style', 'metadata', 'title', 'desc', 'mask', 'clipPath', 'symbol', 'marker', 'pattern',
+                   'filter', 'linearGradient', 'radialGradient'}
+BOX_GEOMETRY_TAGS = {'rect', 'image', 'use', 'foreignObject'}
+DEFAULT_WATCH_DEBOUNCE_SECONDS = 0.5
+DEFAULT_WATCH_POLL_SECONDS = 0.2
+UNKNOWN_NODE_TYPE = 'unknown'
+DEFAULT_PALETTE_PATH = Path(__file__).parent / 'palette.json'
+HEX_COLOR_PATTERN = re.compile(r'#([0-9a-fA-F]{8}|[0-9a-fA-F]{6}|[0-9a-fA-F]{3,4})\b')
+RGB_COLOR_PATTERN = re.compile(r'rgba?\(\s*(\d+)[\s,]+(\d+)[\s,]+(\d+)')
+D65_WHITE = (0.95047, 1.0, 1.08883)
+DEFAULT_VARIANTS_PATH = Path(__file__).parent / 'variants.json'
+COLOR_ATTRIBUTES = ('fill', 'stroke', 'stop-color', 'flood-color', 'lighting-color', 'color', 'style')
+STDLIB_WRITER_INTERNALS = ('_serialize_xml', '_namespace_map', '_escape_attrib', '_escape_cdata')
+STDLIB_WRITER_MIN_VERSION = (3, 8)
+CONFIG_CACHE_SIZE = 16
+PLACEMENT_PRECISION = 6
+
 WHITE = '#ffffff'
 PIT_STOP_TEXT = 'Pit Stop'
 
 LEGEND_ITEM_LABELS = ['Obstacle', 'Anti-Pattern', 'Pattern', PIT_STOP_TEXT]
 
+SVG_NAMESPACE = 'http://www.w3.org/2000/svg'
 SVG_GROUP_TAG = 'g'
 SVG_TEXT_TAG = 'text'
 SVG_PATH_TAG = 'path'
+SVG_STYLE_TAG = 'style'
+SVG_RECT_TAG = f'{{{SVG_NAMESPACE}}}rect'
+
+PROFILE_FORMATS = ['json', 'cprofile']
+
+
+class PipelineProfile:
+    def __init__(self, trace_memory=True, on_stage=None):
+        self.trace_memory = trace_memory
+        self.on_stage = on_stage
+        self.stages = {}
+        self.counters = {}
+        self.total_seconds = 0.0
+        self.active_stages = []
+
+    def _traced_peak(self):
+        return tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+
+    def _fold_peak_into_enclosing_stage(self, peak):
+        if self.active_stages:
+            enclosing = self.active_stages[-1]
+            enclosing['peak'] = max(enclosing['peak'], peak)
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        record = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_memory_bytes': 0, 'counters': {}})
+        self._fold_peak_into_enclosing_stage(self._traced_peak())
+        frame = {'record': record, 'peak': 0}
+        self.active_stages.append(frame)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            elapsed = time.perf_counter() - start
+            self.active_stages.pop()
+            peak = max(frame['peak'], self._traced_peak())
+            record['calls'] += 1
+            record['seconds'] += elapsed
+            record['peak_memory_bytes'] = max(record['peak_memory_bytes'], peak)
+            self._fold_peak_into_enclosing_stage(peak)
+            if not self.active_stages:
+                self.total_seconds += elapsed
+            if self.on_stage:
+                self.on_stage(name, elapsed, record)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+        if self.active_stages:
+            stage_counters = self.active_stages[-1]['record']['counters']
+            stage_counters[name] = stage_counters.get(name, 0) + amount
+
+    def to_dict(self):
+        return {
+            'stages': self.stages,
+            'counters': self.counters,
+            'total_seconds': self.total_seconds,
+        }
+
+
+active_profile = None
+
+@contextlib.contextmanager
+def profiling(profile=None):
+    global active_profile
+    profile = profile or PipelineProfile()
+    started_tracing = profile.trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    previous_profile, active_profile = active_profile, profile
+    try:
+        yield profile
+    finally:
+        active_profile = previous_profile
+        if started_tracing:
+            tracemalloc.stop()
+
+def profile_stage(name):
+    if active_profile is None:
+        return contextlib.nullcontext()
+    return active_profile.stage(name)
+
+def count(name, amount=1):
+    if active_profile is not None:
+        active_profile.count(name, amount)
+
+def run_profiled(action, profile_path, profile_format='json'):
+    if profile_format == 'cprofile':
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(action)
+        finally:
+            profiler.dump_stats(profile_path)
+
+    with profiling() as profile:
+        try:
+            return action()
+        finally:
+            Path(profile_path).write_text(json.dumps(profile.to_dict(), indent=2) + "\n")
 
 class Position:
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -29,37 +221,119 @@ class Position:
 
 
 class SvgShape:
-    def __init__(self, element, position, color):
+    __slots__ = ('element', 'position', 'color', 'matrix')
+
+    def __init__(self, element, position, color, matrix=IDENTITY_MATRIX):
         self.element = element
         self.position = position
         self.color = color
+        self.matrix = matrix
 
 
 class SvgText:
+    __slots__ = ('element', 'position', 'content')
+
     def __init__(self, element, position, content):
         self.element = element
         self.position = position
         self.content = content
 
 
+def parse_color(color):
+    match = HEX_COLOR_PATTERN.search(color)
+    if match:
+        digits = match.group(1)
+        if len(digits) <= 4:
+            digits = ''.join(digit * 2 for digit in digits)
+        return tuple(int(digits[start:start + 2], 16) for start in (0, 2, 4))
+    match = RGB_COLOR_PATTERN.search(color)
+    if match:
+        return tuple(min(int(channel), 255) for channel in match.groups())
+    return None
+
+def srgb_to_linear(channel):
+    channel /= 255
+    return channel / 12.92 if channel <= 0.04045 else ((channel + 0.055) / 1.055) ** 2.4
+
+def lab_component(ratio):
+    return ratio ** (1 / 3) if ratio > 216 / 24389 else (24389 / 27 * ratio + 16) / 116
+
+def rgb_to_lab(rgb):
+    r, g, b = (srgb_to_linear(channel) for channel in rgb)
+    xyz = (0.4124 * r + 0.3576 * g + 0.1805 * b,
+           0.2126 * r + 0.7152 * g + 0.0722 * b,
+           0.0193 * r + 0.1192 * g + 0.9505 * b)
+    fx, fy, fz = (lab_component(value / white) for value, white in zip(xyz, D65_WHITE))
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+class Palette:
+    def __init__(self, node_types, max_distance):
+        self.node_types = node_types
+        self.max_distance = max_distance
+        self.entries = [(rgb_to_lab(parse_color(color)), node_type)
+                        for node_type, colors in node_types.items() for color in colors]
+        self.lookup = {}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config['node_types'], config.get('max_distance', float('inf')))
+
+    def settings(self):
+        return {'node_types': self.node_types, 'max_distance': self.max_distance}
+
+    def classify(self, fill):
+        node_type = self.lookup.get(fill)
+        if node_type is None:
+            node_type = self.lookup[fill] = self._nearest_node_type(fill)
+        return node_type
+
+    def _nearest_node_type(self, fill):
+        rgb = parse_color(fill)
+        if rgb is None or not self.entries:
+            return UNKNOWN_NODE_TYPE
+        lab = rgb_to_lab(rgb)
+        distance, node_type = min((math.dist(lab, entry_lab), node_type) for entry_lab, node_type in self.entries)
+        return node_type if distance <= self.max_distance else UNKNOWN_NODE_TYPE
+
+def file_signature(path):
+    stat = Path(path).stat()
+    return stat.st_mtime_ns, stat.st_size
+
+@functools.lru_cache(maxsize=CONFIG_CACHE_SIZE)
+def read_palette(path, signature):
+    return Palette.from_config(json.loads(Path(path).read_text()))
+
+def load_palette(path=DEFAULT_PALETTE_PATH):
+    return read_palette(str(path), file_signature(path))
+
+active_palette = None
+
+@contextlib.contextmanager
+def using_palette(palette):
+    global active_palette
+    previous_palette, active_palette = active_palette, palette
+    try:
+        yield palette
+    finally:
+        active_palette = previous_palette
+
+def current_palette():
+    return active_palette or load_palette()
+
+
 class MapElement:
-    def __init__(self, shape, texts=None, number=None):
+    __slots__ = ('shape', 'node_type', 'texts', 'number', 'name', 'node_id')
+
+    def __init__(self, shape, texts=None, number=None, palette=None):
         self.shape = shape
-        self.node_type = self._determine_type(shape.color)
+        self.node_type = self._determine_type(shape.color, palette or current_palette())
         self.texts = texts or []
         self.number = number
         self.name = self._combine_texts()
+        self.node_id = None
 
-    def _determine_type(self, color):
-        if '#ffc9c9' in color:
-            return 'obstacle'
-        elif '#b2f2bb' in color:
-            return 'pattern'
-        elif '#ffec99' in color:
-            return 'antipattern'
-        elif '#a5d8ff' in color:
-            return 'pitstop'
-        return 'unknown'
+    def _determine_type(self, color, palette):
+        return palette.classify(color)
 
     def _combine_texts(self):
         if not self.texts:
@@ -73,6 +347,8 @@ class MapElement:
 
 
 class MapElements:
+    __slots__ = ('legend', 'interactive')
+
     def __init__(self, legend, interactive):
         self.legend = legend
         self.interactive = interactive
@@ -84,26 +360,19 @@ class MapElements:
         return len(self.interactive)
 
 
-def identify_shapes_from_svg(root):
-    shapes = []
-
-    for element in root.iter():
-        tag = get_tag_name(element)
+def shape_from_group(element, matrix=IDENTITY_MATRIX):
+    if not is_shape_group_element(element):
+        return None
 
-        if tag == SVG_GROUP_TAG and is_shape_group_element(element):
-            transform = element.attrib.get('transform', '')
-            coords = parse_translate(transform)
+    fill_color = find_fill_color(element)
 
-            if coords:
-                x, y = coords
-                fill_color = find_fill_color(element)
-
-                if fill_color:
-                    position = Position(x, y)
-                    shape = SvgShape(element, position, fill_color)
-                    shapes.append(shape)
+    if fill_color:
+        x, y = apply_matrix(matrix, 0, 0)
+        return SvgShape(element, Position(x, y), fill_color, matrix)
+    return None
 
-    return shapes
+def identify_shapes_from_svg(root):
+    return scan_svg(root).shapes
 
 
 def extract_text_with_position(element):
@@ -125,28 +394,64 @@ def extract_text_with_position(element):
     combined_content = ' '.join(text_contents)
     return combined_content, text_x, text_y
 
-def identify_labels_from_svg(root):
-    labels = []
-
-    for element in root.iter():
-        tag = get_tag_name(element)
-
-        if tag == SVG_GROUP_TAG and element_has_text_child(element):
-            transform = element.attrib.get('transform', '')
-            coords = parse_translate(transform)
+def label_from_group(element, matrix=IDENTITY_MATRIX):
+    if not element_has_text_child(element):
+        return None
 
-            if coords:
-                x, y = coords
-                combined_content, text_x, text_y = extract_text_with_position(element)
+    combined_content, text_x, text_y = extract_text_with_position(element)
 
-                if combined_content:
-                    actual_x = x + text_x
-                    actual_y = y + text_y
-                    position = Position(actual_x, actual_y)
-                    label = SvgText(element, position, combined_content)
-                    labels.append(label)
+    if combined_content:
+        actual_x, actual_y = apply_matrix(matrix, text_x, text_y)
+        return SvgText(element, Position(actual_x, actual_y), combined_content)
+    return None
 
-    return labels
+def identify_labels_from_svg(root):
+    return scan_svg(root).labels
+
+
+class SvgScan:
+    def __init__(self):
+        self.shapes = []
+        self.labels = []
+        self.background = None
+        self.parents = {}
+        self.parent_matrices = {}
+
+    def record(self, element, parent, matrix, parent_matrix=IDENTITY_MATRIX):
+        if get_tag_name(element) == SVG_GROUP_TAG:
+            shape = shape_from_group(element, matrix)
+            if shape:
+                self.shapes.append(shape)
+                self.parents[element] = parent
+                self.parent_matrices[element] = parent_matrix
+
+            label = label_from_group(element, matrix)
+            if label:
+                self.labels.append(label)
+                self.parents[element] = parent
+                self.parent_matrices[element] = parent_matrix
+        elif self.background is None and element.tag == SVG_RECT_TAG and is_white_background_rectangle(element):
+            self.background = element
+            self.parents[element] = parent
+
+
+def element_matrix(parent_matrix, element):
+    transform = element.get('transform')
+    if transform:
+        return multiply_matrices(parent_matrix, parse_transform(transform))
+    return parent_matrix
+
+def scan_svg(root, scan=None, parent=None, parent_matrix=IDENTITY_MATRIX):
+    scan = scan or SvgScan()
+    scanned = 0
+
+    with profile_stage('scan'):
+        for element, element_parent, matrix, ancestor_matrix in backend_for_element(root).walk(root, parent, parent_matrix):
+            scan.record(element, element_parent, matrix, ancestor_matrix)
+            scanned += 1
+        count('elements_scanned', scanned)
+
+    return scan
 
 
 def match_nearest_label(shape, labels, max_distance):
@@ -162,68 +467,263 @@ def match_nearest_label(shape, labels, max_distance):
     return closest
 
 
-def get_available_items(items, used_indices):
-    return [item for i, item in enumerate(items) if i not in used_indices]
+class PositionColumns:
+    __slots__ = ('xs', 'ys')
+
+    def __init__(self, items):
+        self.xs = array('d', (item.position.x for item in items))
+        self.ys = array('d', (item.position.y for item in items))
+
+    def __len__(self):
+        return len(self.xs)
+
+    def distance(self, index, x, y):
+        return math.sqrt((x - self.xs[index])**2 + (y - self.ys[index])**2)
+
+
+class LabelIndex:
+    __slots__ = ('columns', 'cell_size', 'cells')
+
+    def __init__(self, labels, cell_size):
+        self.columns = PositionColumns(labels)
+        self.cell_size = cell_size
+        self.cells = {}
+        for index in range(len(self.columns)):
+            self.cells.setdefault(self._cell_of(self.columns.xs[index], self.columns.ys[index]), []).append(index)
+
+    def _cell_of(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _candidate_indices(self, x, y, max_distance):
+        min_col, min_row = self._cell_of(x - max_distance, y - max_distance)
+        max_col, max_row = self._cell_of(x + max_distance, y + max_distance)
+        for col in range(min_col, max_col + 1):
+            for row in range(min_row, max_row + 1):
+                yield from self.cells.get((col, row), ())
+
+    def nearest(self, x, y, max_distance):
+        closest_index = None
+        min_distance = float('inf')
+        computed = 0
+
+        for index in self._candidate_indices(x, y, max_distance):
+            distance = self.columns.distance(index, x, y)
+            computed += 1
+            if distance >= max_distance or distance > min_distance:
+                continue
+            if distance < min_distance or index < closest_index:
+                min_distance = distance
+                closest_index = index
+
+        count('distance_computations', computed)
+        return closest_index, min_distance
+
+    def within(self, x, y, max_distance):
+        return [index for index in self._candidate_indices(x, y, max_distance)
+                if self.columns.distance(index, x, y) < max_distance]
+
+    def remove(self, index):
+        if index is not None:
+            self.cells[self._cell_of(self.columns.xs[index], self.columns.ys[index])].remove(index)
 
-def mark_label_as_used(label, all_labels, used_indices):
-    if label:
-        index = all_labels.index(label)
-        used_indices.add(index)
 
 def separate_names_from_numbers(labels):
     pattern_names = [l for l in labels if not l.content.isdigit()]
     numbers = [l for l in labels if l.content.isdigit()]
     return pattern_names, numbers
 
-def sort_shapes_by_proximity_to_names(shapes, pattern_names):
-    shapes_with_nearest_distance = []
-    for shape in shapes:
-        nearest_name = match_nearest_label(shape, pattern_names, TEXT_TO_SHAPE_MAX_DISTANCE)
-        min_distance = shape.position.distance_to(nearest_name.position) if nearest_name else float('inf')
-        shapes_with_nearest_distance.append((shape, min_distance))
-
-    return [shape for shape, _ in sorted(shapes_with_nearest_distance, key=lambda x: x[1])]
+def sort_shapes_by_proximity_to_names(shape_columns, name_index):
+    nearest_distances = [
+        name_index.nearest(shape_columns.xs[index], shape_columns.ys[index], TEXT_TO_SHAPE_MAX_DISTANCE)[1]
+        for index in range(len(shape_columns))
+    ]
+    return sorted(range(len(shape_columns)), key=nearest_distances.__getitem__)
 
 def build_map_elements(shapes, labels):
     pattern_names, numbers = separate_names_from_numbers(labels)
-    used_numbers = set()
-    used_names = set()
+    shape_columns = PositionColumns(shapes)
+    name_index = LabelIndex(pattern_names, TEXT_TO_SHAPE_MAX_DISTANCE)
+    number_index = LabelIndex(numbers, NUMBER_TO_SHAPE_MAX_DISTANCE)
+    palette = current_palette()
     elements = []
 
-    sorted_shapes = sort_shapes_by_proximity_to_names(shapes, pattern_names)
+    for shape_index in sort_shapes_by_proximity_to_names(shape_columns, name_index):
+        x, y = shape_columns.xs[shape_index], shape_columns.ys[shape_index]
+        name_index_match, _ = name_index.nearest(x, y, TEXT_TO_SHAPE_MAX_DISTANCE)
+        number_index_match, _ = number_index.nearest(x, y, NUMBER_TO_SHAPE_MAX_DISTANCE)
 
-    for shape in sorted_shapes:
-        available_names = get_available_items(pattern_names, used_names)
-        available_numbers = get_available_items(numbers, used_numbers)
-        closest_name = match_nearest_label(shape, available_names, TEXT_TO_SHAPE_MAX_DISTANCE)
-        matched_number = match_nearest_label(shape, available_numbers, NUMBER_TO_SHAPE_MAX_DISTANCE)
+        if name_index_match is not None or number_index_match is not None:
+            texts = [pattern_names[name_index_match]] if name_index_match is not None else []
+            number = numbers[number_index_match] if number_index_match is not None else None
+            elements.append(MapElement(shapes[shape_index], texts=texts, number=number, palette=palette))
 
-        if closest_name or matched_number:
-            texts = [closest_name] if closest_name else []
-            element = MapElement(shape, texts=texts, number=matched_number)
+            name_index.remove(name_index_match)
+            number_index.remove(number_index_match)
 
-            mark_label_as_used(closest_name, pattern_names, used_names)
-            mark_label_as_used(matched_number, numbers, used_numbers)
+    return elements
 
-            elements.append(element)
 
-    return elements
+def feasible_pairs(shapes, labels, max_distance):
+    shape_columns = PositionColumns(shapes)
+    label_index = LabelIndex(labels, max_distance)
+    pairs = []
+    for shape_index in range(len(shape_columns)):
+        x, y = shape_columns.xs[shape_index], shape_columns.ys[shape_index]
+        for label_position in label_index.within(x, y, max_distance):
+            pairs.append((shape_index, label_position, label_index.columns.distance(label_position, x, y)))
+    count('distance_computations', len(pairs))
+    return pairs
+
+def solve_min_cost_assignment(cost):
+    rows, columns = cost.shape
+    if rows > columns:
+        rows_by_column = solve_min_cost_assignment(cost.T)
+        columns_by_row = np.full(rows, -1)
+        assigned = rows_by_column >= 0
+        columns_by_row[rows_by_column[assigned]] = np.nonzero(assigned)[0]
+        return columns_by_row
+
+    row_potential = np.zeros(rows + 1)
+    column_potential = np.zeros(columns + 1)
+    row_of_column = np.zeros(columns + 1, dtype=int)
+    previous_column = np.zeros(columns + 1, dtype=int)
+
+    for row in range(1, rows + 1):
+        row_of_column[0] = row
+        column = 0
+        min_slack = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+
+        while row_of_column[column] != 0:
+            used[column] = True
+            current_row = row_of_column[column]
+            slack = cost[current_row - 1] - row_potential[current_row] - column_potential[1:]
+            improved = ~used[1:] & (slack < min_slack[1:])
+            min_slack[1:][improved] = slack[improved]
+            previous_column[1:][improved] = column
+
+            candidates = np.where(used[1:], np.inf, min_slack[1:])
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+
+            row_potential[row_of_column[used]] += delta
+            column_potential[used] -= delta
+            min_slack[~used] -= delta
+            column = next_column
+
+        while column:
+            row_of_column[column] = row_of_column[previous_column[column]]
+            column = previous_column[column]
+
+    columns_by_row = np.full(rows, -1)
+    assigned = row_of_column[1:] > 0
+    columns_by_row[row_of_column[1:][assigned] - 1] = np.nonzero(assigned)[0]
+    return columns_by_row
+
+def connected_components(pairs, shape_count):
+    parent = list(range(shape_count))
+    label_roots = {}
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for shape_index, label_position, _ in pairs:
+        if label_position in label_roots:
+            parent[find(shape_index)] = find(label_roots[label_position])
+        else:
+            label_roots[label_position] = shape_index
+
+    components = {}
+    for pair in pairs:
+        components.setdefault(find(pair[0]), []).append(pair)
+    return list(components.values())
+
+def assign_labels_to_shapes(pairs, shape_count, max_distance):
+    label_by_shape = [-1] * shape_count
+
+    for component in connected_components(pairs, shape_count):
+        rows = sorted({shape_index for shape_index, _, _ in component})
+        columns = sorted({label_position for _, label_position, _ in component})
+        row_of, column_of = {row: index for index, row in enumerate(rows)}, {column: index for index, column in enumerate(columns)}
+
+        infeasible_cost = max_distance * (min(len(rows), len(columns)) + 1)
+        cost = np.full((len(rows), len(columns)), infeasible_cost)
+        feasible = np.zeros((len(rows), len(columns)), dtype=bool)
+        for shape_index, label_position, distance in component:
+            cost[row_of[shape_index], column_of[label_position]] = distance
+            feasible[row_of[shape_index], column_of[label_position]] = True
+
+        columns_by_row = solve_min_cost_assignment(cost)
+        for row, column in enumerate(columns_by_row):
+            if column >= 0 and feasible[row, column]:
+                label_by_shape[rows[row]] = columns[column]
+
+    return label_by_shape
+
+def build_map_elements_by_assignment(shapes, labels):
+    if np is None:
+        raise RuntimeError("The 'assignment' matching engine requires numpy")
 
+    pattern_names, numbers = separate_names_from_numbers(labels)
+    name_pairs = feasible_pairs(shapes, pattern_names, TEXT_TO_SHAPE_MAX_DISTANCE)
+    number_pairs = feasible_pairs(shapes, numbers, NUMBER_TO_SHAPE_MAX_DISTANCE)
+
+    name_by_shape = assign_labels_to_shapes(name_pairs, len(shapes), TEXT_TO_SHAPE_MAX_DISTANCE)
+    number_by_shape = assign_labels_to_shapes(number_pairs, len(shapes), NUMBER_TO_SHAPE_MAX_DISTANCE)
+
+    nearest_name_distance = [math.inf] * len(shapes)
+    for shape_index, _, distance in name_pairs:
+        nearest_name_distance[shape_index] = min(nearest_name_distance[shape_index], distance)
+    palette = current_palette()
+    elements = []
 
-def identify_map_elements(root):
-    shapes = identify_shapes_from_svg(root)
-    labels = identify_labels_from_svg(root)
+    for shape_index in sorted(range(len(shapes)), key=nearest_name_distance.__getitem__):
+        name_index = name_by_shape[shape_index]
+        number_index = number_by_shape[shape_index]
+
+        if name_index >= 0 or number_index >= 0:
+            texts = [pattern_names[name_index]] if name_index >= 0 else []
+            number = numbers[number_index] if number_index >= 0 else None
+            elements.append(MapElement(shapes[shape_index], texts=texts, number=number, palette=palette))
+
+    return elements
 
+MATCHING_ENGINES = {
+    'greedy': build_map_elements,
+    'assignment': build_map_elements_by_assignment,
+}
+
+def match_shapes_to_labels(shapes, labels, engine='greedy'):
     legend_labels, regular_labels, legend_shapes, regular_shapes = separate_legend_items(shapes, labels)
 
-    legend_elements = build_map_elements(legend_shapes, legend_labels)
-    interactive_elements = build_map_elements(regular_shapes, regular_labels)
+    build_elements = MATCHING_ENGINES[engine]
+    return build_elements(legend_shapes, legend_labels), build_elements(regular_shapes, regular_labels)
+
+def identify_map_elements(root, engine='greedy', scan=None):
+    scan = scan or scan_svg(root)
+
+    with profile_stage('identify'):
+        legend_elements, interactive_elements = match_shapes_to_labels(scan.shapes, scan.labels, engine)
 
-    return MapElements(legend_elements, interactive_elements)
+        count('shapes', len(scan.shapes))
+        count('labels', len(scan.labels))
+        count('map_elements', len(legend_elements) + len(interactive_elements))
+
+    return assign_node_ids(MapElements(legend_elements, interactive_elements))
+
+def assign_node_ids(map_elements):
+    for node_id, element in enumerate(element for element in map_elements.interactive if element.is_interactive()):
+        element.node_id = node_id
+    return map_elements
 
 
 def set_interactive_attributes(group, element):
     group.set('class', 'interactive-node')
+    if element.node_id is not None:
+        group.set('data-node-id', str(element.node_id))
     if element.name:
         group.set('data-label', element.name)
     group.set('data-color', element.node_type)
@@ -235,13 +735,15 @@ def set_non_interactive_attributes(group, element):
     if element.name:
         group.set('data-type', element.name)
 
-def map_element_to_svg_group(element):
-    g = ET.Element('g')
-
+def set_map_element_attributes(group, element):
     if element.is_interactive():
-        set_interactive_attributes(g, element)
+        set_interactive_attributes(group, element)
     else:
-        set_non_interactive_attributes(g, element)
+        set_non_interactive_attributes(group, element)
+
+def map_element_to_svg_group(element):
+    g = element.shape.element.makeelement('g', {})
+    set_map_element_attributes(g, element)
 
     g.append(element.shape.element)
     if element.number:
@@ -251,10 +753,10 @@ def map_element_to_svg_group(element):
     return g
 
 
-def add_map_elements_to_svg(root, map_elements):
-    for element in map_elements:
-        group = map_element_to_svg_group(element)
-        root.append(group)
+def map_element_groups(map_elements):
+    groups = [map_element_to_svg_group(element) for element in map_elements.legend]
+    groups += [map_element_to_svg_group(element) for element in map_elements.interactive]
+    return groups
 
 
 def partition_list(items, predicate):
@@ -277,13 +779,64 @@ def separate_legend_items(shapes, labels):
     return legend_labels, regular_labels, legend_shapes, regular_shapes
 
 def get_tag_name(element):
-    return element.tag.split('}')[-1] if '}' in element.tag else element.tag
-
-def parse_translate(transform):
-    match = re.search(r'translate\(([\d.-]+)\s+([\d.-]+)\)', transform)
-    if match:
-        return float(match.group(1)), float(match.group(2))
-    return None
+    return get_tag_name_from_string(element.tag)
+
+@functools.lru_cache(maxsize=None)
+def get_tag_name_from_string(tag):
+    return tag.split('}')[-1] if '}' in tag else tag
+
+def multiply_matrices(first, second):
+    a1, b1, c1, d1, e1, f1 = first
+    a2, b2, c2, d2, e2, f2 = second
+    return (
+        a1 * a2 + c1 * b2,
+        b1 * a2 + d1 * b2,
+        a1 * c2 + c1 * d2,
+        b1 * c2 + d1 * d2,
+        a1 * e2 + c1 * f2 + e1,
+        b1 * e2 + d1 * f2 + f1,
+    )
+
+def invert_matrix(matrix):
+    a, b, c, d, e, f = matrix
+    determinant = a * d - b * c
+    return (d / determinant, -b / determinant, -c / determinant, a / determinant,
+            (c * f - d * e) / determinant, (b * e - a * f) / determinant)
+
+def apply_matrix(matrix, x, y):
+    a, b, c, d, e, f = matrix
+    return a * x + c * y + e, b * x + d * y + f
+
+def rotation_matrix(angle, cx=0.0, cy=0.0):
+    radians = math.radians(angle)
+    cos, sin = math.cos(radians), math.sin(radians)
+    rotation = (cos, sin, -sin, cos, 0.0, 0.0)
+    if cx or cy:
+        rotation = multiply_matrices(multiply_matrices((1.0, 0.0, 0.0, 1.0, cx, cy), rotation), (1.0, 0.0, 0.0, 1.0, -cx, -cy))
+    return rotation
+
+def transform_step_matrix(name, values):
+    if name == 'matrix' and len(values) == 6:
+        return tuple(values)
+    if name == 'translate' and values:
+        return (1.0, 0.0, 0.0, 1.0, values[0], values[1] if len(values) > 1 else 0.0)
+    if name == 'scale' and values:
+        return (values[0], 0.0, 0.0, values[1] if len(values) > 1 else values[0], 0.0, 0.0)
+    if name == 'rotate' and values:
+        return rotation_matrix(*values[:3])
+    if name == 'skewX' and values:
+        return (1.0, 0.0, math.tan(math.radians(values[0])), 1.0, 0.0, 0.0)
+    if name == 'skewY' and values:
+        return (1.0, math.tan(math.radians(values[0])), 0.0, 1.0, 0.0, 0.0)
+    return IDENTITY_MATRIX
+
+@functools.lru_cache(maxsize=4096)
+def parse_transform(transform):
+    matrix = IDENTITY_MATRIX
+    for name, arguments in TRANSFORM_STEP_PATTERN.findall(transform):
+        values = [float(value) for value in NUMBER_PATTERN.findall(arguments)]
+        matrix = multiply_matrices(matrix, transform_step_matrix(name, values))
+    return matrix
 
 def calculate_distance(x1, y1, x2, y2):
     return Position(x1, y1).distance_to(Position(x2, y2))
@@ -323,63 +876,1498 @@ def is_shape_group_element(element):
 def is_white_background_rectangle(rectangle):
     return rectangle.attrib.get('fill') == WHITE and rectangle.attrib.get('x') == '0' and rectangle.attrib.get('y') == '0'
 
-def remove_white_background_rectangle(root):
-    for rectangle in root.findall('.//{http://www.w3.org/2000/svg}rect'):
-        if is_white_background_rectangle(rectangle):
-            root.remove(rectangle)
-            break
-
-def remove_elements_from_parents(elements, parent_map):
-    for element in elements:
-        parent = parent_map.get(element.element)
+def consumed_elements(scan):
+    consumed = [shape.element for shape in scan.shapes] + [label.element for label in scan.labels]
+    if scan.background is not None:
+        consumed.append(scan.background)
+    return consumed
+
+def place_under_root(element, parent_matrix, root_matrix):
+    placement = parent_matrix
+    if root_matrix != IDENTITY_MATRIX:
+        placement = multiply_matrices(invert_matrix(root_matrix), parent_matrix)
+    if placement == IDENTITY_MATRIX:
+        return
+
+    matrix = f"matrix({' '.join(format_number(value, PLACEMENT_PRECISION) for value in placement)})"
+    transform = element.get('transform')
+    element.set('transform', f"{matrix} {transform}" if transform else matrix)
+
+def place_consumed_elements(root, scan):
+    root_matrix = parse_transform(root.get('transform', ''))
+    for element, parent_matrix in scan.parent_matrices.items():
+        place_under_root(element, parent_matrix, root_matrix)
+
+def rewrite_parents(root, scan, groups):
+    consumed = consumed_elements(scan)
+    consumed_ids = {id(element) for element in consumed}
+    parents = {id(root): root}
+    for element in consumed:
+        parent = scan.parents.get(element)
         if parent is not None:
-            safe_remove_element(parent, element.element)
+            parents[id(parent)] = parent
 
-def remove_original_elements_from_svg(root, shapes, labels):
-    parent_map = {c: p for p in root.iter() for c in p}
-    remove_elements_from_parents(shapes, parent_map)
-    remove_elements_from_parents(labels, parent_map)
+    for parent in parents.values():
+        kept = [child for child in parent if id(child) not in consumed_ids]
+        parent[:] = kept + groups if parent is root else kept
 
-def to_semantic_map(root):
-    map_elements = identify_map_elements(root)
-    restructure_svg(root, map_elements)
-    return map_elements.interactive_count(), map_elements.legend_count()
-
-def load_svg_tree(svg_path):
-    ET.register_namespace('', 'http://www.w3.org/2000/svg')
-    tree = ET.parse(svg_path)
+def to_semantic_map(root, engine='greedy', matcher=None):
+    scan = scan_svg(root)
+    if matcher is None:
+        map_elements = identify_map_elements(root, engine, scan)
+    else:
+        map_elements = matcher.identify(scan)
+    restructure_svg(root, map_elements, scan)
+    return map_elements
+
+class StdlibXmlBackend:
+    name = 'stdlib'
+    shares_subtrees = True
+
+    def parse(self, svg_path):
+        return ET.parse(svg_path)
+
+    def iterparse(self, svg_path, events):
+        return ET.iterparse(svg_path, events=events)
+
+    def walk(self, root, parent, parent_matrix):
+        pending = [(root, parent, parent_matrix)]
+        while pending:
+            element, parent, parent_matrix = pending.pop()
+            matrix = element_matrix(parent_matrix, element)
+            yield element, parent, matrix, parent_matrix
+            pending.extend((child, element, matrix) for child in reversed(element))
+
+    def write(self, tree, output):
+        tree.write(output, encoding='utf-8', xml_declaration=True)
+
+
+class LxmlXmlBackend:
+    name = 'lxml'
+    shares_subtrees = False
+
+    def __init__(self):
+        self.parser = lxml_etree.XMLParser(remove_comments=True, remove_pis=True, huge_tree=True)
+        self.scan_candidates = lxml_etree.XPath(
+            "descendant-or-self::*[(local-name() = 'g' and (@stroke-linecap or *[local-name() = 'text']))"
+            " or (local-name() = 'rect' and namespace-uri() = $svg and @fill = $white)]")
+
+    def parse(self, svg_path):
+        return lxml_etree.parse(str(svg_path), self.parser)
+
+    def iterparse(self, svg_path, events):
+        return lxml_etree.iterparse(str(svg_path), events=events, remove_comments=True, remove_pis=True, huge_tree=True)
+
+    def walk(self, root, parent, parent_matrix):
+        matrices = {root: element_matrix(parent_matrix, root)}
+        for element in self.scan_candidates(root, svg=SVG_NAMESPACE, white=WHITE):
+            ancestors = []
+            node = element
+            while node not in matrices:
+                ancestors.append(node)
+                node = node.getparent()
+            matrix = matrices[node]
+            for node in reversed(ancestors):
+                matrix = matrices[node] = element_matrix(matrix, node)
+            if element is root:
+                yield element, parent, matrices[element], parent_matrix
+            else:
+                element_parent = element.getparent()
+                yield element, element_parent, matrices[element], matrices[element_parent]
+
+    def write(self, tree, output):
+        ET.ElementTree(tree.getroot()).write(output, encoding='utf-8', xml_declaration=True)
+
+
+XML_BACKENDS = {'stdlib': StdlibXmlBackend()}
+if lxml_etree is not None:
+    XML_BACKENDS['lxml'] = LxmlXmlBackend()
+
+def xml_backend(name=None):
+    if name is None:
+        return XML_BACKENDS['stdlib']
+    if name not in XML_BACKENDS:
+        raise RuntimeError(f"The '{name}' XML backend requires {name}")
+    return XML_BACKENDS[name]
+
+def backend_for_element(element):
+    if lxml_etree is not None and isinstance(element, lxml_etree._Element):
+        return XML_BACKENDS['lxml']
+    return XML_BACKENDS['stdlib']
+
+def load_svg_tree(svg_path, xml_backend_name=None):
+    ET.register_namespace('', SVG_NAMESPACE)
+    with profile_stage('parse'):
+        tree = xml_backend(xml_backend_name).parse(svg_path)
     root = tree.getroot()
     return tree, root
 
-def save_svg_tree(tree, output_path):
-    tree.write(output_path, encoding='utf-8', xml_declaration=True)
-
-def restructure_svg(root, map_elements):
-    shapes = identify_shapes_from_svg(root)
-    labels = identify_labels_from_svg(root)
+class OutputSink(io.BufferedIOBase):
+    def __init__(self, output_path, precompress=False):
+        super().__init__()
+        self.output = open(output_path, 'wb')
+        self.bytes_written = 0
+        self.gzip_output = None
+        self.brotli_output = None
+        if precompress:
+            self.gzip_file = open(f"{output_path}.gz", 'wb')
+            self.gzip_output = gzip.GzipFile(filename='', mode='wb', fileobj=self.gzip_file, mtime=0)
+            if brotli is not None:
+                self.brotli_output = open(f"{output_path}.br", 'wb')
+                self.brotli_compressor = brotli.Compressor()
+
+    def writable(self):
+        return True
 
-    remove_white_background_rectangle(root)
-    remove_original_elements_from_svg(root, shapes, labels)
+    def write(self, data):
+        self.output.write(data)
+        self.bytes_written += len(data)
+        if self.gzip_output is not None:
+            self.gzip_output.write(data)
+        if self.brotli_output is not None:
+            self.brotli_output.write(self.brotli_compressor.process(bytes(data)))
+        return len(data)
+
+    def close(self):
+        if self.closed:
+            return
+        self.output.close()
+        count('bytes_written', self.bytes_written)
+        if self.gzip_output is not None:
+            self.gzip_output.close()
+            self.gzip_file.close()
+        if self.brotli_output is not None:
+            self.brotli_output.write(self.brotli_compressor.finish())
+            self.brotli_output.close()
+        super().close()
+
+
+def save_svg_tree(tree, output_path, precompress=False):
+    with profile_stage('write'), OutputSink(output_path, precompress) as sink:
+        backend_for_element(tree.getroot()).write(tree, sink)
+
+def restructure_svg(root, map_elements, scan=None):
+    scan = scan or scan_svg(root)
+
+    with profile_stage('restructure'):
+        place_consumed_elements(root, scan)
+        rewrite_parents(root, scan, map_element_groups(map_elements))
+
+class OutputOptions:
+    def __init__(self, fonts_dir=None, font_url_prefix='', precision=None, precompress=False, node_index=False,
+                 documents_dir=DEFAULT_DOCUMENTS_DIR, tile_levels=None, palette_path=DEFAULT_PALETTE_PATH,
+                 variants_path=None):
+        self.fonts_dir = fonts_dir
+        self.font_url_prefix = font_url_prefix
+        self.precision = precision
+        self.precompress = precompress
+        self.node_index = node_index
+        self.documents_dir = documents_dir
+        self.tile_levels = tile_levels
+        self.palette_path = palette_path
+        self.variants_path = variants_path
+
+    def palette(self):
+        return load_palette(self.palette_path)
+
+    def variants(self):
+        return load_variants(self.variants_path) if self.variants_path else ()
+
+    def settings(self):
+        return {
+            'fonts_dir': str(self.fonts_dir) if self.fonts_dir else None,
+            'font_url_prefix': self.font_url_prefix,
+            'precision': self.precision,
+            'node_index': self.node_index,
+            'palette': self.palette().settings(),
+        }
+
+
+class OutputReport:
+    def __init__(self):
+        self.fonts = []
+        self.bytes_saved = 0
+        self.variants = []
+
+
+def font_file_name(family, font_format, font_bytes):
+    slug = re.sub(r'[^a-z0-9]+', '-', family.lower()).strip('-') or 'font'
+    return f"{slug}-{hashlib.sha256(font_bytes).hexdigest()[:16]}.{font_format}"
+
+def write_font_file(fonts_dir, family, font_format, encoded_font):
+    font_bytes = base64.b64decode(''.join(encoded_font.split()))
+    file_name = font_file_name(family, font_format, font_bytes)
+    font_path = Path(fonts_dir) / file_name
+    if not font_path.exists():
+        font_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomically(font_path, font_bytes)
+    return file_name
+
+def extract_font_face(font_face, options, report):
+    family_match = FONT_FAMILY_PATTERN.search(font_face)
+    family = family_match.group(1).strip() if family_match else 'font'
+
+    def replace_data_uri(match):
+        file_name = write_font_file(options.fonts_dir, family, match.group('format'), match.group('data'))
+        report.fonts.append(file_name)
+        return f"url({options.font_url_prefix}{file_name})"
+
+    return FONT_DATA_URI_PATTERN.sub(replace_data_uri, font_face)
+
+def extract_embedded_fonts(element, options, report):
+    for style in element.iter():
+        if get_tag_name(style) == SVG_STYLE_TAG and style.text and 'data:font/' in style.text:
+            style.text = FONT_FACE_PATTERN.sub(lambda match: extract_font_face(match.group(0), options, report), style.text)
+
+def format_number(value, precision):
+    formatted = f"{round(value, precision):.{precision}f}"
+    if '.' in formatted:
+        formatted = formatted.rstrip('0').rstrip('.')
+    return '0' if formatted in ('', '-0') else formatted
+
+def round_numbers(value, precision):
+    return NUMBER_PATTERN.sub(lambda match: format_number(float(match.group(0)), precision), value)
+
+def minify_transform(transform, precision):
+    transform = round_numbers(transform, precision)
+    transform = IDENTITY_TRANSFORM_PATTERN.sub('', transform)
+    return ' '.join(transform.split())
+
+def minify_attribute(key, value, precision):
+    if key == 'transform':
+        return minify_transform(value, precision)
+    if key in ROUNDED_ATTRIBUTES:
+        return round_numbers(value, precision)
+    return value
+
+def is_whitespace(text):
+    return text is not None and not text.strip()
+
+def minify_whitespace(element, report):
+    tag = get_tag_name(element)
+    if tag == SVG_STYLE_TAG and element.text:
+        minified = ' '.join(element.text.split())
+        report.bytes_saved += utf8_length(element.text) - utf8_length(minified)
+        element.text = minified or None
+    elif tag not in TEXT_CONTENT_TAGS:
+        if is_whitespace(element.text):
+            report.bytes_saved += utf8_length(element.text)
+            element.text = None
+        for child in element:
+            if is_whitespace(child.tail):
+                report.bytes_saved += utf8_length(child.tail)
+                child.tail = None
+
+def utf8_length(text):
+    return len(text.encode('utf-8'))
+
+def minify_element(element, inherited, precision, report):
+    own_properties = dict(inherited)
+
+    for key, value in list(element.items()):
+        local_key = get_tag_name_from_string(key)
+        minified = minify_attribute(local_key, value, precision)
+
+        if local_key in INHERITED_PRESENTATION_DEFAULTS:
+            redundant = inherited[local_key] == minified
+            own_properties[local_key] = minified
+        else:
+            redundant = local_key == 'transform' and not minified
 
-    add_map_elements_to_svg(root, map_elements.legend)
-    add_map_elements_to_svg(root, map_elements.interactive)
+        if redundant:
+            del element.attrib[key]
+            report.bytes_saved += utf8_length(f' {local_key}="{value}"')
+        elif minified != value:
+            element.set(key, minified)
+            report.bytes_saved += utf8_length(value) - utf8_length(minified)
 
-def save_semantic_map(svg_path, output_path):
-    tree, root = load_svg_tree(svg_path)
+    minify_whitespace(element, report)
+    for child in element:
+        minify_element(child, own_properties, precision, report)
+
+def inherited_presentation(parent):
+    properties = dict(INHERITED_PRESENTATION_DEFAULTS)
+    if parent is not None:
+        for key, value in parent.items():
+            local_key = get_tag_name_from_string(key)
+            if local_key in properties:
+                properties[local_key] = value
+    return properties
+
+def postprocess_output(element, options, report, parent=None):
+    if options.fonts_dir:
+        extract_embedded_fonts(element, options, report)
+    if options.precision is not None:
+        minify_element(element, inherited_presentation(parent), options.precision, report)
+
+
+class StdlibXmlWriter(dict):
+    def __init__(self):
+        if not stdlib_writer_supported():
+            raise RuntimeError(f"Streamed serialization needs the ElementTree writer internals of Python "
+                               f"{'.'.join(map(str, STDLIB_WRITER_MIN_VERSION))}+")
+        super().__init__({None: None})
+        self.namespaces = {}
+
+    def __missing__(self, qname):
+        if qname[:1] == '{':
+            uri, tag = qname[1:].rsplit('}', 1)
+            prefix = self.namespaces.get(uri)
+            if prefix is None:
+                prefix = ET._namespace_map.get(uri)
+                if prefix is None:
+                    prefix = f"ns{len(self.namespaces)}"
+                if prefix != 'xml':
+                    self.namespaces[uri] = prefix
+            serialized = f"{prefix}:{tag}" if prefix else tag
+        else:
+            serialized = qname
+        self[qname] = serialized
+        return serialized
+
+    def resolve_element(self, element):
+        for qname in [element.tag, *element.keys()]:
+            self[qname]
+
+    def write_element(self, write, element):
+        ET._serialize_xml(write, element, self, None, short_empty_elements=True)
+
+    def write_start_tag(self, write, element):
+        write("<" + self[element.tag])
+        for key, value in element.items():
+            write(f' {self[key]}="{ET._escape_attrib(value)}"')
+        write(">")
+
+    def write_end_tag(self, write, element):
+        write(f"</{self[element.tag]}>")
+
+    def write_group(self, write, group, children):
+        self.write_start_tag(write, group)
+        for child in children:
+            self.write_element(write, child)
+        self.write_end_tag(write, group)
+
+    def write_document(self, output, root, body):
+        output.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        output.write("<" + self[root.tag])
+        for uri, prefix in sorted(self.namespaces.items(), key=lambda item: item[1]):
+            output.write(f' xmlns{":" + prefix if prefix else ""}="{ET._escape_attrib(uri)}"')
+        for key, value in root.items():
+            output.write(f' {self[key]}="{ET._escape_attrib(value)}"')
+
+        if not root.text and body.tell() == 0:
+            output.write(" />")
+        else:
+            output.write(">")
+            if root.text:
+                output.write(ET._escape_cdata(root.text))
+            body.seek(0)
+            shutil.copyfileobj(body, output)
+            output.write(f"</{self[root.tag]}>")
+        if root.tail:
+            output.write(ET._escape_cdata(root.tail))
+
+def stdlib_writer_supported():
+    return sys.version_info >= STDLIB_WRITER_MIN_VERSION and all(hasattr(ET, name) for name in STDLIB_WRITER_INTERNALS)
+
+class SpooledElement:
+    __slots__ = ('offset', 'length', 'bounds')
+
+    def __init__(self, offset, length, bounds=None):
+        self.offset = offset
+        self.length = length
+        self.bounds = bounds
+
+
+class SemanticMapStream:
+    def __init__(self, body, spool, output_options, report, matcher=None):
+        self.body = body
+        self.spool = spool
+        self.matcher = matcher
+        self.output_options = output_options
+        self.report = report
+        self.writer = StdlibXmlWriter()
+        self.scan = SvgScan()
+        self.root = None
+        self.root_matrix = IDENTITY_MATRIX
+
+    def start_root(self, root):
+        self.root = root
+        self.root_matrix = parse_transform(root.get('transform', ''))
+        self.writer.resolve_element(root)
+
+    def write(self, element):
+        postprocess_output(element, self.output_options, self.report, self.root)
+        self.writer.write_element(self.body.write, element)
+
+    def spool_element(self, element):
+        holder = self.root.makeelement(SVG_GROUP_TAG, {})
+        holder.append(element)
+        postprocess_output(holder, self.output_options, self.report, self.root)
+
+        parts = []
+        self.writer.write_element(parts.append, element)
+        data = ''.join(parts).encode('utf-8', 'xmlcharrefreplace')
+        spooled = SpooledElement(self.spool.tell(), len(data))
+        self.spool.write(data)
+        return spooled
+
+    def add_top_level_element(self, element):
+        scan = self.scan
+        shape_count, label_count, background = len(scan.shapes), len(scan.labels), scan.background
+        scan_svg(element, scan, self.root, self.root_matrix)
+
+        shapes, labels = scan.shapes[shape_count:], scan.labels[label_count:]
+        consumed = [item.element for item in shapes + labels]
+        if scan.background is not background:
+            consumed.append(scan.background)
+
+        for consumed_element in consumed:
+            parent = scan.parents.pop(consumed_element, self.root)
+            if parent is not self.root:
+                safe_remove_element(parent, consumed_element)
+
+        if all(consumed_element is not element for consumed_element in consumed):
+            self.write(element)
+        self.root.remove(element)
+
+        spooled = {}
+        for item in shapes + labels:
+            if item.element not in spooled:
+                place_under_root(item.element, scan.parent_matrices.pop(item.element), self.root_matrix)
+                spooled[item.element] = self.spool_element(item.element)
+        if self.output_options.node_index:
+            for shape in shapes:
+                spooled[shape.element].bounds = shape_bounds(shape)
+        for item in shapes + labels:
+            item.element = spooled[item.element]
+
+    def write_spooled_group(self, element):
+        group = self.root.makeelement(SVG_GROUP_TAG, {})
+        set_map_element_attributes(group, element)
+        postprocess_output(group, self.output_options, self.report, self.root)
+
+        self.writer.write_start_tag(self.body.write, group)
+        for spooled in [element.shape, *([element.number] if element.number else []), *element.texts]:
+            self.spool.seek(spooled.element.offset)
+            self.body.write(self.spool.read(spooled.element.length).decode('utf-8'))
+        self.writer.write_end_tag(self.body.write, group)
+
+    def finish(self, engine, output_path):
+        if self.matcher is None:
+            map_elements = identify_map_elements(self.root, engine, self.scan)
+        else:
+            map_elements = self.matcher.identify(self.scan)
+        for element in map_elements.legend + map_elements.interactive:
+            self.write_spooled_group(element)
+
+        postprocess_output(self.root, self.output_options, self.report)
+        with profile_stage('write'), OutputSink(output_path, self.output_options.precompress) as sink:
+            output = io.TextIOWrapper(sink, encoding='utf-8', errors='xmlcharrefreplace', newline='\n')
+            self.writer.write_document(output, self.root, self.body)
+            output.flush()
+            output.detach()
+        return map_elements
+
+
+def stream_semantic_map(svg_path, output_path, engine='greedy', output_options=None, report=None, matcher=None,
+                        xml_backend_name=None):
+    ET.register_namespace('', SVG_NAMESPACE)
+    pending = None
+    depth = 0
+
+    with tempfile.TemporaryFile('w+', encoding='utf-8', errors='xmlcharrefreplace', newline='') as body, \
+            tempfile.TemporaryFile() as spool:
+        stream = SemanticMapStream(body, spool, output_options or OutputOptions(), report or OutputReport(), matcher)
+        with profile_stage('stream'):
+            for event, element in xml_backend(xml_backend_name).iterparse(svg_path, ('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if depth == 1:
+                        stream.start_root(element)
+                    elif depth == 2 and pending is not None:
+                        stream.add_top_level_element(pending)
+                        pending = None
+                else:
+                    depth -= 1
+                    if depth == 1:
+                        pending = element
+                    elif depth == 0 and pending is not None:
+                        stream.add_top_level_element(pending)
+
+        return stream.finish(engine, output_path)
+
+def write_semantic_map(svg_path, output_path, engine='greedy', output_options=None, report=None, matcher=None,
+                       xml_backend_name=None):
+    tree, root = load_svg_tree(svg_path, xml_backend_name)
+
+    output_options = output_options or OutputOptions()
+    report = report or OutputReport()
+    map_elements = to_semantic_map(root, engine, matcher)
+    with profile_stage('postprocess'):
+        postprocess_output(root, output_options, report)
+
+    save_svg_tree(tree, output_path, output_options.precompress)
+    report.variants = write_map_variants(root, output_path, output_options)
+    return map_elements
+
+class MapVariant:
+    def __init__(self, name, suffix, colors=None, root_class=None):
+        self.name = name
+        self.suffix = suffix
+        self.colors = {source.lower(): target for source, target in (colors or {}).items()}
+        self.root_class = root_class
+
+    @classmethod
+    def from_config(cls, name, config):
+        return cls(name, config.get('suffix', f"_{name}"), config.get('colors'), config.get('class'))
+
+    def output_path(self, output_path):
+        output_path = Path(output_path)
+        return output_path.with_name(f"{output_path.stem}{self.suffix}{output_path.suffix}")
+
+    def remap_color(self, match):
+        return self.colors.get(match.group(0).lower(), match.group(0))
+
+    def remapped_attributes(self, element):
+        attributes = None
+        for key in COLOR_ATTRIBUTES:
+            value = element.get(key)
+            if value is None or '#' not in value:
+                continue
+            remapped = HEX_COLOR_PATTERN.sub(self.remap_color, value)
+            if remapped != value:
+                attributes = attributes or dict(element.items())
+                attributes[key] = remapped
+        return attributes
+
+    def copy_on_write(self, element):
+        children = [self.copy_on_write(child) for child in element]
+        attributes = self.remapped_attributes(element)
+        if attributes is None and all(new is old for new, old in zip(children, element)):
+            return element
+
+        clone = element.makeelement(element.tag, attributes or dict(element.items()))
+        clone.text, clone.tail = element.text, element.tail
+        clone.extend(children)
+        return clone
+
+    def apply(self, root):
+        if not backend_for_element(root).shares_subtrees:
+            root = copy.deepcopy(root)
+        variant_root = self.copy_on_write(root)
+        if self.root_class:
+            if variant_root is root:
+                variant_root = root.makeelement(root.tag, dict(root.items()))
+                variant_root.text = root.text
+                variant_root.extend(list(root))
+            classes = variant_root.get('class', '').split()
+            variant_root.set('class', ' '.join(classes + [self.root_class]))
+        return variant_root
+
+@functools.lru_cache(maxsize=CONFIG_CACHE_SIZE)
+def read_variants(path, signature):
+    return tuple(MapVariant.from_config(name, config) for name, config in json.loads(Path(path).read_text()).items())
+
+def load_variants(path=DEFAULT_VARIANTS_PATH):
+    return read_variants(str(path), file_signature(path))
+
+def write_map_variants(root, output_path, output_options):
+    written = []
+    for variant in output_options.variants():
+        with profile_stage('variants'):
+            variant_root = variant.apply(root)
+        save_svg_tree(ET.ElementTree(variant_root), variant.output_path(output_path), output_options.precompress)
+        written.append(variant.name)
+    return written
+
+def path_points(d):
+    points = []
+    x = y = start_x = start_y = 0.0
+    for command, arguments in PATH_COMMAND_PATTERN.findall(d):
+        values = [float(value) for value in NUMBER_PATTERN.findall(arguments)]
+        relative = command.islower()
+        command = command.upper()
+        if command == 'Z':
+            x, y = start_x, start_y
+        elif command in 'HV':
+            for value in values:
+                if command == 'H':
+                    x = x + value if relative else value
+                else:
+                    y = y + value if relative else value
+                points.append((x, y))
+        else:
+            arity = PATH_COMMAND_ARITY[command]
+            for offset in range(0, len(values) - arity + 1, arity):
+                segment = values[offset:offset + arity]
+                coordinates = segment[5:] if command == 'A' else segment
+                base_x, base_y = (x, y) if relative else (0.0, 0.0)
+                points.extend((base_x + px, base_y + py) for px, py in zip(coordinates[0::2], coordinates[1::2]))
+                x, y = points[-1]
+                if command == 'M' and offset == 0:
+                    start_x, start_y = x, y
+    return points
+
+def attribute_number(element, key, default=0.0):
+    values = NUMBER_PATTERN.findall(element.get(key, ''))
+    return float(values[0]) if values else default
+
+def box_corners(x, y, width, height):
+    return [(x, y), (x + width, y), (x, y + height), (x + width, y + height)]
+
+def geometry_points(element, tag):
+    if tag == SVG_PATH_TAG:
+        return path_points(element.get('d', ''))
+    if tag in BOX_GEOMETRY_TAGS:
+        return box_corners(attribute_number(element, 'x'), attribute_number(element, 'y'),
+                           attribute_number(element, 'width'), attribute_number(element, 'height'))
+    if tag in ('circle', 'ellipse'):
+        rx = attribute_number(element, 'r' if tag == 'circle' else 'rx')
+        ry = attribute_number(element, 'r' if tag == 'circle' else 'ry')
+        return box_corners(attribute_number(element, 'cx') - rx, attribute_number(element, 'cy') - ry, 2 * rx, 2 * ry)
+    if tag == 'line':
+        return [(attribute_number(element, 'x1'), attribute_number(element, 'y1')),
+                (attribute_number(element, 'x2'), attribute_number(element, 'y2'))]
+    if tag in ('polyline', 'polygon'):
+        values = [float(value) for value in NUMBER_PATTERN.findall(element.get('points', ''))]
+        return list(zip(values[0::2], values[1::2]))
+    if tag in ('text', 'tspan') and ('x' in element.attrib or 'y' in element.attrib):
+        return [(attribute_number(element, 'x'), attribute_number(element, 'y'))]
+    return []
+
+def element_points(element, parent_matrix=IDENTITY_MATRIX):
+    points = []
+    pending = [(element, parent_matrix)]
+    while pending:
+        node, matrix = pending.pop()
+        tag = get_tag_name(node)
+        if tag in BASE_LAYER_TAGS:
+            continue
+        matrix = element_matrix(matrix, node)
+        points.extend(apply_matrix(matrix, x, y) for x, y in geometry_points(node, tag))
+        pending.extend((child, matrix) for child in node)
+    return points
+
+def points_bounds(points):
+    if not points:
+        return None
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def shape_bounds(shape):
+    if isinstance(shape.element, SpooledElement):
+        return shape.element.bounds
+    return points_bounds([point for child in shape.element for point in element_points(child, shape.matrix)])
+
+def shape_bbox(shape):
+    bounds = shape_bounds(shape)
+    if bounds is None:
+        return [round(shape.position.x, 2), round(shape.position.y, 2), 0, 0]
+    min_x, min_y, max_x, max_y = bounds
+    return [round(min_x, 2), round(min_y, 2), round(max_x - min_x, 2), round(max_y - min_y, 2)]
+
+def document_title(markdown):
+    if markdown.startswith('---'):
+        markdown = markdown.split('\n---', 1)[-1]
+    for line in markdown.splitlines():
+        if line.strip().startswith('#'):
+            title = TITLE_CATEGORY_SUFFIX_PATTERN.sub('', re.sub(r'^#\s*', '', line.strip())).strip()
+            return TITLE_LEADING_EMOJI_PATTERN.sub('', title)
+    return None
 
-    interactive_count, legend_count = to_semantic_map(root)
+def normalize_title(title):
+    return ' '.join(title.casefold().split())
+
+def load_document_titles(documents_dir):
+    titles = {}
+    for category in DOCUMENT_CATEGORIES.values():
+        for path in sorted(Path(documents_dir).glob(f"{category}/*.md")):
+            title = document_title(path.read_text(encoding='utf-8'))
+            if title:
+                titles.setdefault(category, {})[normalize_title(title)] = path.stem
+    return titles
+
+def resolve_document(label, node_type, titles):
+    if not label:
+        return None, None
+    preferred = DOCUMENT_CATEGORIES.get(node_type)
+    categories = [preferred] + [category for category in titles if category != preferred]
+    for category in categories:
+        slug = titles.get(category, {}).get(normalize_title(label))
+        if slug:
+            return category, slug
+    return None, None
+
+def fuzzy_title(title):
+    return FUZZY_TITLE_SEPARATOR_PATTERN.sub(' ', title.casefold()).strip()
+
+def title_trigrams(title):
+    padded = f"  {title} "
+    return {padded[start:start + 3] for start in range(len(padded) - 2)}
+
+class DocumentResolver:
+    def __init__(self, titles):
+        self.titles = titles
+        self.documents = []
+        self.document_trigrams = []
+        self.trigrams = {}
+        for category, category_titles in titles.items():
+            for title, slug in category_titles.items():
+                for alias in {fuzzy_title(title), fuzzy_title(slug)}:
+                    document_id = len(self.documents)
+                    self.documents.append((category, slug))
+                    self.document_trigrams.append(title_trigrams(alias))
+                    for trigram in self.document_trigrams[-1]:
+                        self.trigrams.setdefault(trigram, []).append(document_id)
+
+    def resolve(self, label, node_type=None):
+        category, slug = resolve_document(label, node_type, self.titles)
+        if slug:
+            return category, slug, 1.0
+        if not label or not fuzzy_title(label):
+            return None, None, 0.0
+
+        wanted = title_trigrams(fuzzy_title(label))
+        shared = {}
+        for trigram in wanted:
+            for document_id in self.trigrams.get(trigram, ()):
+                shared[document_id] = shared.get(document_id, 0) + 1
+
+        preferred = DOCUMENT_CATEGORIES.get(node_type)
+        best = (None, None, 0.0)
+        for document_id, shared_count in shared.items():
+            category, slug = self.documents[document_id]
+            confidence = shared_count / len(wanted | self.document_trigrams[document_id])
+            if preferred and category != preferred:
+                confidence -= OTHER_CATEGORY_PENALTY
+            if confidence > best[2] or (confidence == best[2] and (category, slug) < best[:2]):
+                best = (category, slug, confidence)
+
+        if best[2] < MIN_RESOLUTION_CONFIDENCE:
+            return None, None, round(max(best[2], 0.0), 3)
+        return best[0], best[1], round(best[2], 3)
+
+    def resolve_nodes(self, nodes):
+        resolved_nodes = []
+        for node in nodes:
+            category, slug, confidence = self.resolve(node['label'], node['type'])
+            resolved_nodes.append(dict(node, category=category, slug=slug, confidence=confidence))
+        return resolved_nodes
+
+    def report(self, resolved_nodes):
+        referenced = {(node['category'], node['slug']) for node in resolved_nodes if node['slug']}
+        return {
+            'unresolved': [{'id': node['id'], 'label': node['label'], 'type': node['type']}
+                           for node in resolved_nodes if not node['slug']],
+            'fuzzy': [{'id': node['id'], 'label': node['label'], 'slug': f"{node['category']}/{node['slug']}",
+                       'confidence': node['confidence']}
+                      for node in resolved_nodes if node['slug'] and node['confidence'] < 1.0],
+            'orphaned': sorted(f"{category}/{slug}" for category, category_titles in self.titles.items()
+                               for slug in category_titles.values() if (category, slug) not in referenced),
+        }
+
+def map_index_nodes(map_elements):
+    return [{
+        'id': element.node_id,
+        'number': element.number.content if element.number else None,
+        'label': element.name,
+        'type': element.node_type,
+        'bbox': shape_bbox(element.shape),
+    } for element in map_elements.interactive if element.is_interactive()]
+
+def node_index_path(output_path):
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.nodes.json")
+
+def resolution_report_path(output_path):
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.resolution.json")
+
+def write_node_index(output_path, nodes, documents_dir):
+    resolver = DocumentResolver(load_document_titles(documents_dir))
+    resolved_nodes = resolver.resolve_nodes(nodes)
+    index_path = node_index_path(output_path)
+    write_atomically(index_path, json.dumps({'nodes': resolved_nodes}, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    report = json.dumps(resolver.report(resolved_nodes), ensure_ascii=False, indent=2) + "\n"
+    write_atomically(resolution_report_path(output_path), report.encode('utf-8'))
+    return index_path
+
+def view_box(root, drawables):
+    values = [float(value) for value in NUMBER_PATTERN.findall(root.get('viewBox', ''))]
+    if len(values) == 4:
+        return values
+    if 'width' in root.attrib and 'height' in root.attrib:
+        return [0.0, 0.0, attribute_number(root, 'width'), attribute_number(root, 'height')]
+    min_x, min_y, max_x, max_y = points_bounds([corner for _, _, bounds in drawables for corner in (bounds[:2], bounds[2:])])
+    return [min_x, min_y, max_x - min_x, max_y - min_y]
+
+def split_tile_layers(root):
+    base, drawables, outlines = [], [], []
+    for child in root:
+        if get_tag_name(child) in BASE_LAYER_TAGS:
+            base.append(child)
+            continue
+        bounds = points_bounds(element_points(child))
+        if bounds is None:
+            continue
+        drawables.append((child, None, bounds))
+
+        node_class = child.get('class')
+        if node_class == 'non-interactive-element':
+            outlines.append((child, None, bounds))
+        elif node_class == 'interactive-node' and len(child):
+            outline_bounds = points_bounds(element_points(child[0]))
+            if outline_bounds is not None:
+                outlines.append((child, [child[0]], outline_bounds))
+    return base, drawables, outlines
+
+def tile_range(low, high, origin, size, tile_count):
+    first = min(max(math.floor((low - origin) / size), 0), tile_count - 1)
+    last = min(max(math.floor((high - origin) / size), 0), tile_count - 1)
+    return range(first, last + 1)
+
+def write_tile(path, root, bounds, entries):
+    writer = StdlibXmlWriter()
+    tile_root = ET.Element(root.tag, dict(root.items()))
+    tile_root.set('viewBox', ' '.join(format_number(value, 3) for value in bounds))
+    tile_root.set('width', format_number(bounds[2], 3))
+    tile_root.set('height', format_number(bounds[3], 3))
+    writer.resolve_element(tile_root)
+
+    body = io.StringIO()
+    for element, children in entries:
+        if children is None:
+            writer.write_element(body.write, element)
+        else:
+            writer.write_group(body.write, element, children)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8', errors='xmlcharrefreplace', newline='') as output:
+        writer.write_document(output, tile_root, body)
+
+def remove_stale_tiles(tiles_dir):
+    for level_dir in tiles_dir.iterdir() if tiles_dir.exists() else []:
+        if level_dir.is_dir() and level_dir.name.isdigit():
+            for tile in level_dir.glob('*_*.svg'):
+                tile.unlink()
+
+def write_map_tiles(svg_path, tiles_dir, levels=DEFAULT_TILE_LEVELS, xml_backend_name=None):
+    tiles_dir = Path(tiles_dir)
+    _, root = load_svg_tree(svg_path, xml_backend_name)
+    base, drawables, outlines = split_tile_layers(root)
+    box = view_box(root, drawables)
+    remove_stale_tiles(tiles_dir)
+
+    write_tile(tiles_dir / TILE_BASE_NAME, root, box, [(element, None) for element in base])
+    manifest = {'viewBox': box, 'base': TILE_BASE_NAME, 'levels': []}
+    for level in range(levels):
+        tiles_per_axis = 2 ** level
+        tile_width, tile_height = box[2] / tiles_per_axis, box[3] / tiles_per_axis
+        full_detail = level == levels - 1
+
+        tiles = {}
+        for element, children, (min_x, min_y, max_x, max_y) in drawables if full_detail else outlines:
+            for column in tile_range(min_x, max_x, box[0], tile_width, tiles_per_axis):
+                for row in tile_range(min_y, max_y, box[1], tile_height, tiles_per_axis):
+                    tiles.setdefault((column, row), []).append((element, children))
+
+        level_manifest = {'level': level, 'detail': 'full' if full_detail else 'outline',
+                          'tileWidth': tile_width, 'tileHeight': tile_height, 'tiles': []}
+        for (column, row), entries in sorted(tiles.items()):
+            bounds = [box[0] + column * tile_width, box[1] + row * tile_height, tile_width, tile_height]
+            tile_path = f"{level}/{column}_{row}.svg"
+            write_tile(tiles_dir / tile_path, root, bounds, entries)
+            level_manifest['tiles'].append({'path': tile_path, 'column': column, 'row': row, 'bounds': bounds,
+                                            'elements': len(entries)})
+        manifest['levels'].append(level_manifest)
+
+    write_atomically(tiles_dir / TILE_MANIFEST_NAME, (json.dumps(manifest, indent=2) + "\n").encode('utf-8'))
+    return manifest
+
+def tiles_dir_for(output_path):
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.tiles")
+
+def map_element_summary(element):
+    return {
+        'name': element.name,
+        'number': element.number.content if element.number else None,
+        'node_type': element.node_type,
+    }
+
+def element_index(map_elements):
+    return {
+        'legend': [map_element_summary(element) for element in map_elements.legend],
+        'interactive': [map_element_summary(element) for element in map_elements.interactive],
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def tool_fingerprint():
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+
+def matching_settings(engine):
+    return {
+        'tool': tool_fingerprint(),
+        'engine': engine,
+        'excluded_shape_proximity_threshold': EXCLUDED_SHAPE_PROXIMITY_THRESHOLD,
+        'text_to_shape_max_distance': TEXT_TO_SHAPE_MAX_DISTANCE,
+        'number_to_shape_max_distance': NUMBER_TO_SHAPE_MAX_DISTANCE,
+    }
+
+
+class MapCache:
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def key_for(self, svg_bytes, engine, output_options=None):
+        settings = matching_settings(engine)
+        settings['output'] = (output_options or OutputOptions()).settings()
+        digest = hashlib.sha256(svg_bytes)
+        digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _paths(self, key):
+        return self.directory / f"{key}.svg", self.directory / f"{key}.json"
+
+    def load(self, key):
+        svg_path, index_path = self._paths(key)
+        try:
+            output_bytes = svg_path.read_bytes()
+            index = json.loads(index_path.read_text())
+            os.utime(svg_path)
+            os.utime(index_path)
+        except (OSError, ValueError):
+            return None
+        return output_bytes, index
+
+    def store(self, key, output_bytes, index):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        svg_path, index_path = self._paths(key)
+        write_atomically(index_path, json.dumps(index).encode('utf-8'))
+        write_atomically(svg_path, output_bytes)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for path in self.directory.glob('*.svg'):
+            try:
+                stat = path.stat()
+                index_size = path.with_suffix('.json').stat().st_size
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size + index_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            for stale_path in (path, path.with_suffix('.json')):
+                try:
+                    stale_path.unlink()
+                except FileNotFoundError:
+                    pass
+            total_size -= size
+
+
+def write_atomically(path, data):
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as temporary:
+        temporary.write(data)
+    os.chmod(temporary.name, 0o644)
+    os.replace(temporary.name, path)
+
+def index_counts(index):
+    return len(index['interactive']), len(index['legend'])
+
+def cached_artifacts_exist(index, output_options):
+    return all((Path(output_options.fonts_dir) / file_name).exists() for file_name in index.get('fonts', []))
+
+def conversion_index(map_elements, report, output_options):
+    index = element_index(map_elements)
+    index['fonts'] = sorted(set(report.fonts))
+    index['bytes_saved'] = report.bytes_saved
+    if output_options.node_index:
+        index['nodes'] = map_index_nodes(map_elements)
+    return index
+
+def matching_key(item):
+    if isinstance(item, SvgText):
+        return f"{item.position.x!r} {item.position.y!r} {item.content}"
+    return f"{item.position.x!r} {item.position.y!r}"
+
+def matching_keys(items):
+    occurrences = {}
+    keys = []
+    for item in items:
+        key = matching_key(item)
+        occurrence = occurrences.get(key, 0)
+        occurrences[key] = occurrence + 1
+        keys.append(f"{key}:{occurrence}" if occurrence else key)
+    return keys
+
+def label_reach(label):
+    return NUMBER_TO_SHAPE_MAX_DISTANCE if label.content.isdigit() else TEXT_TO_SHAPE_MAX_DISTANCE
+
+def changed_neighbourhood(shapes, labels, changed_shapes, changed_labels, removed_positions):
+    shape_index = LabelIndex(shapes, TEXT_TO_SHAPE_MAX_DISTANCE)
+    label_index = LabelIndex(labels, TEXT_TO_SHAPE_MAX_DISTANCE)
+    dirty_shapes, dirty_labels = set(changed_shapes), set(changed_labels)
+    for x, y in removed_positions:
+        dirty_shapes.update(shape_index.within(x, y, TEXT_TO_SHAPE_MAX_DISTANCE))
+        dirty_labels.update(label_index.within(x, y, TEXT_TO_SHAPE_MAX_DISTANCE))
+
+    pending_shapes, pending_labels = list(dirty_shapes), list(dirty_labels)
+    while pending_shapes or pending_labels:
+        while pending_shapes:
+            position = shapes[pending_shapes.pop()].position
+            for index in label_index.within(position.x, position.y, TEXT_TO_SHAPE_MAX_DISTANCE):
+                if index not in dirty_labels and position.distance_to(labels[index].position) < label_reach(labels[index]):
+                    dirty_labels.add(index)
+                    pending_labels.append(index)
+        while pending_labels:
+            label = labels[pending_labels.pop()]
+            for index in shape_index.within(label.position.x, label.position.y, label_reach(label)):
+                if index not in dirty_shapes:
+                    dirty_shapes.add(index)
+                    pending_shapes.append(index)
+
+    return dirty_shapes, dirty_labels
+
+def emission_keys(elements, names):
+    name_index = LabelIndex(names, TEXT_TO_SHAPE_MAX_DISTANCE)
+    return [name_index.nearest(element.shape.position.x, element.shape.position.y, TEXT_TO_SHAPE_MAX_DISTANCE)[1]
+            for element in elements]
+
+
+class IncrementalMatcher:
+    def __init__(self, state_path=None, engine='greedy'):
+        self.state_path = Path(state_path) if state_path is not None else None
+        self.engine = engine
+        self.settings = matching_settings(engine)
+        self.previous = self._load_previous_state()
+        self.state = None
+        self.rematched_shapes = 0
+
+    def _load_previous_state(self):
+        if self.state_path is None:
+            return None
+        try:
+            state = json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return None
+        return state if state.get('settings') == self.settings else None
+
+    def _dirty_items(self, scan, shape_keys, label_keys):
+        if self.previous is None:
+            return set(range(len(shape_keys))), set(range(len(label_keys)))
+
+        previous_shapes, previous_labels = self.previous['shapes'], self.previous['labels']
+        current_shapes, current_labels = set(shape_keys), set(label_keys)
+        removed_positions = [position for key, position in previous_shapes.items() if key not in current_shapes]
+        removed_positions += [position for key, position in previous_labels.items() if key not in current_labels]
+        changed_shapes = [index for index, key in enumerate(shape_keys) if key not in previous_shapes]
+        changed_labels = [index for index, key in enumerate(label_keys) if key not in previous_labels]
+        return changed_neighbourhood(scan.shapes, scan.labels, changed_shapes, changed_labels, removed_positions)
+
+    def _reused_entries(self, scan, shape_keys, label_keys, dirty_shapes):
+        if self.previous is None:
+            return []
+
+        shape_positions = {key: index for index, key in enumerate(shape_keys)}
+        label_positions = {key: index for index, key in enumerate(label_keys)}
+        palette = current_palette()
+        entries = []
+        for entry in self.previous['elements']:
+            shape_index = shape_positions.get(entry['shape'])
+            if shape_index is None or shape_index in dirty_shapes:
+                continue
+            texts = [scan.labels[label_positions[entry['name']]]] if entry['name'] else []
+            number = scan.labels[label_positions[entry['number']]] if entry['number'] else None
+            element = MapElement(scan.shapes[shape_index], texts=texts, number=number, palette=palette)
+            entries.append((entry['legend'], entry['sort_key'], shape_index, element))
+        return entries
+
+    def _rematched_entries(self, scan, dirty_shapes, dirty_labels):
+        shapes = [scan.shapes[index] for index in sorted(dirty_shapes)]
+        labels = [scan.labels[index] for index in sorted(dirty_labels)]
+        shape_indices = {id(shape): index for index, shape in zip(sorted(dirty_shapes), shapes)}
+
+        legend_labels, regular_labels, _, _ = separate_legend_items(shapes, labels)
+        legend_elements, interactive_elements = match_shapes_to_labels(shapes, labels, self.engine)
+        regular_names, _ = separate_names_from_numbers(regular_labels)
+
+        entries = []
+        for legend, elements, names in ((True, legend_elements, legend_labels), (False, interactive_elements, regular_names)):
+            for element, sort_key in zip(elements, emission_keys(elements, names)):
+                entries.append((legend, sort_key, shape_indices[id(element.shape)], element))
+        return entries
+
+    def identify(self, scan):
+        with profile_stage('identify'):
+            shape_keys, label_keys = matching_keys(scan.shapes), matching_keys(scan.labels)
+            dirty_shapes, dirty_labels = self._dirty_items(scan, shape_keys, label_keys)
+            entries = self._reused_entries(scan, shape_keys, label_keys, dirty_shapes)
+            entries += self._rematched_entries(scan, dirty_shapes, dirty_labels)
+            entries.sort(key=lambda entry: (entry[1], entry[2]))
+
+            self.rematched_shapes = len(dirty_shapes)
+            count('rematched_shapes', len(dirty_shapes))
+            count('map_elements', len(entries))
+
+            key_by_label = {id(label): key for label, key in zip(scan.labels, label_keys)}
+            self.state = {
+                'settings': self.settings,
+                'shapes': {key: [shape.position.x, shape.position.y] for shape, key in zip(scan.shapes, shape_keys)},
+                'labels': {key: [label.position.x, label.position.y] for label, key in zip(scan.labels, label_keys)},
+                'elements': [{
+                    'shape': shape_keys[shape_index],
+                    'name': key_by_label[id(element.texts[0])] if element.texts else None,
+                    'number': key_by_label[id(element.number)] if element.number else None,
+                    'legend': legend,
+                    'sort_key': sort_key,
+                } for legend, sort_key, shape_index, element in entries],
+            }
+
+        self.previous = self.state
+        return assign_node_ids(MapElements([entry[3] for entry in entries if entry[0]],
+                                           [entry[3] for entry in entries if not entry[0]]))
+
+    def save(self):
+        if self.state_path is None:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomically(self.state_path, json.dumps(self.state).encode('utf-8'))
+
+def incremental_state_path(state_dir, output_path):
+    output_digest = hashlib.sha256(str(Path(output_path).resolve()).encode('utf-8')).hexdigest()
+    return Path(state_dir) / f"{output_digest[:16]}.json"
+
+def convert_semantic_map(svg_path, output_path, engine='greedy', streaming=False, cache_dir=None, output_options=None,
+                         incremental_dir=None, xml_backend_name=None, matcher=None):
+    write = stream_semantic_map if streaming and stdlib_writer_supported() else write_semantic_map
+    output_options = output_options or OutputOptions()
+    report = OutputReport()
+    if matcher is None and incremental_dir is not None:
+        matcher = IncrementalMatcher(incremental_state_path(incremental_dir, output_path), engine)
+
+    def convert():
+        with using_palette(output_options.palette()):
+            map_elements = write(svg_path, output_path, engine, output_options, report, matcher, xml_backend_name)
+        index = conversion_index(map_elements, report, output_options)
+        if matcher is not None:
+            matcher.save()
+        return index
+
+    if cache_dir is None:
+        index = convert()
+    else:
+        index = convert_with_cache(MapCache(cache_dir), convert, svg_path, output_path, engine, output_options)
+
+    if output_options.variants() and not report.variants:
+        _, root = load_svg_tree(output_path, xml_backend_name)
+        report.variants = write_map_variants(root, output_path, output_options)
+    if output_options.node_index:
+        write_node_index(output_path, index['nodes'], output_options.documents_dir)
+    if output_options.tile_levels:
+        write_map_tiles(output_path, tiles_dir_for(output_path), output_options.tile_levels, xml_backend_name)
+    return index
+
+def convert_with_cache(cache, convert, svg_path, output_path, engine, output_options):
+    key = cache.key_for(Path(svg_path).read_bytes(), engine, output_options)
+    cached = cache.load(key)
+    if cached and cached_artifacts_exist(cached[1], output_options):
+        output_bytes, index = cached
+        count('cache_hits')
+        with OutputSink(output_path, output_options.precompress) as sink:
+            sink.write(output_bytes)
+        return index
+
+    index = convert()
+    cache.store(key, Path(output_path).read_bytes(), index)
+    return index
+
+def save_semantic_map(svg_path, output_path, engine='greedy', streaming=False, cache_dir=None, output_options=None,
+                      incremental_dir=None, xml_backend_name=None):
+    index = convert_semantic_map(svg_path, output_path, engine, streaming, cache_dir, output_options, incremental_dir,
+                                 xml_backend_name)
+    interactive_count, legend_count = index_counts(index)
 
-    save_svg_tree(tree, output_path)
     print(f"Grouped SVG saved to: {output_path}")
     print(f"Created {interactive_count} interactive nodes and {legend_count} legend items")
+    if index['bytes_saved']:
+        print(f"Minification saved {index['bytes_saved']} bytes")
+    return interactive_count, legend_count
+
+
+class BatchResult:
+    def __init__(self, input_path, output_path, index=None, error=None):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.index = index
+        self.counts = index_counts(index) if index else None
+        self.error = error
+
+    def summary(self):
+        if self.error:
+            return f"{self.input_path}: FAILED ({self.error})"
+        interactive_count, legend_count = self.counts
+        summary = f"{self.input_path} -> {self.output_path}: {interactive_count} interactive, {legend_count} legend"
+        if self.index['bytes_saved']:
+            summary += f", {self.index['bytes_saved']} bytes saved"
+        return summary
+
+
+def semantic_output_path(input_path, output_dir):
+    return Path(output_dir) / f"semantic_{Path(input_path).stem}.svg"
+
+def batch_jobs_from_globs(patterns, output_dir):
+    jobs = {}
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            jobs.setdefault(Path(path), semantic_output_path(path, output_dir))
+    return list(jobs.items())
+
+def batch_jobs_from_manifest(manifest_path, output_dir):
+    manifest_path = Path(manifest_path)
+    jobs = []
+    for entry in json.loads(manifest_path.read_text()):
+        input_path = manifest_path.parent / entry['input']
+        if 'output' in entry:
+            output_path = manifest_path.parent / entry['output']
+        else:
+            output_path = semantic_output_path(input_path, output_dir)
+        jobs.append((input_path, output_path))
+    return jobs
+
+def check_unique_outputs(jobs):
+    inputs_by_output = {}
+    for input_path, output_path in jobs:
+        inputs_by_output.setdefault(Path(output_path).resolve(), []).append(str(input_path))
+    collisions = [f"{output_path} <- {', '.join(inputs)}" for output_path, inputs in inputs_by_output.items() if len(inputs) > 1]
+    if collisions:
+        raise ValueError("Several inputs map to the same output; list them in a --manifest with explicit outputs:\n  "
+                         + "\n  ".join(collisions))
+    return jobs
+
+def batch_result(input_path, output_path, conversion):
+    try:
+        return BatchResult(input_path, output_path, index=conversion())
+    except Exception as error:
+        return BatchResult(input_path, output_path, error=error)
+
+def run_batch(jobs, max_workers=None, **conversion_options):
+    check_unique_outputs(jobs)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for input_path, output_path in jobs:
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            futures.append(executor.submit(convert_semantic_map, str(input_path), str(output_path), **conversion_options))
+
+        return [batch_result(input_path, output_path, future.result) for (input_path, output_path), future in zip(jobs, futures)]
+
+def run_batch_in_process(jobs, **conversion_options):
+    check_unique_outputs(jobs)
+    results = []
+    for input_path, output_path in jobs:
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        conversion = functools.partial(convert_semantic_map, str(input_path), str(output_path), **conversion_options)
+        results.append(batch_result(input_path, output_path, conversion))
+    return results
+
+class MapWatcher:
+    def __init__(self, jobs, debounce=DEFAULT_WATCH_DEBOUNCE_SECONDS, clock=time.monotonic, **conversion_options):
+        self.jobs = [(Path(input_path), Path(output_path)) for input_path, output_path in jobs]
+        self.debounce = debounce
+        self.clock = clock
+        self.conversion_options = conversion_options
+        self.matchers = {output_path: self._matcher(output_path) for _, output_path in self.jobs}
+        self.signatures = {}
+        self.digests = {}
+        self.changed_at = {}
+
+    def _matcher(self, output_path):
+        incremental_dir = self.conversion_options.get('incremental_dir')
+        state_path = incremental_state_path(incremental_dir, output_path) if incremental_dir is not None else None
+        return IncrementalMatcher(state_path, self.conversion_options.get('engine', 'greedy'))
+
+    def _signature(self, input_path):
+        try:
+            stat = input_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _convert(self, input_path, output_path):
+        svg_bytes = input_path.read_bytes()
+        digest = hashlib.sha256(svg_bytes).hexdigest()
+        if self.digests.get(input_path) == digest:
+            return None
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        result = batch_result(input_path, output_path, functools.partial(
+            convert_semantic_map, str(input_path), str(output_path), matcher=self.matchers[output_path],
+            **self.conversion_options))
+        if result.error is None:
+            self.digests[input_path] = digest
+        return result
+
+    def poll(self):
+        now = self.clock()
+        results = []
+        for input_path, output_path in self.jobs:
+            signature = self._signature(input_path)
+            if signature is None:
+                continue
+            first_poll = input_path not in self.signatures
+            if signature != self.signatures.get(input_path):
+                self.signatures[input_path] = signature
+                self.changed_at[input_path] = float('-inf') if first_poll else now
+            changed_at = self.changed_at.get(input_path)
+            if changed_at is None or now - changed_at < self.debounce:
+                continue
+
+            del self.changed_at[input_path]
+            result = self._convert(input_path, output_path)
+            if result is not None:
+                results.append(result)
+        return results
+
+    def run(self, poll_interval=DEFAULT_WATCH_POLL_SECONDS):
+        print(f"Watching {len(self.jobs)} map(s) for changes (Ctrl+C to stop)")
+        try:
+            while True:
+                for result in self.poll():
+                    print(result.summary())
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Convert Excalidraw map exports into semantic SVGs.")
+    parser.add_argument('inputs', nargs='*',
+                        help="input SVG paths or glob patterns (default: the talk map)")
+    parser.add_argument('--manifest',
+                        help="JSON list of {\"input\", \"output\"} entries, relative to the manifest")
+    parser.add_argument('--output-dir',
+                        help="directory for semantic_<name>.svg outputs (default: website/public/maps)")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="number of worker processes for batch conversion (default: CPU count)")
+    parser.add_argument('--engine', choices=sorted(MATCHING_ENGINES), default='greedy',
+                        help="label matching engine ('assignment' requires numpy)")
+    parser.add_argument('--xml-backend', choices=['stdlib', 'lxml'], default=None,
+                        help="XML parser to use (default: the standard library; lxml must be installed to opt in)")
+    parser.add_argument('--stream', action='store_true',
+                        help="parse the input incrementally to keep memory bounded on very large maps")
+    parser.add_argument('--cache', nargs='?', const=str(DEFAULT_CACHE_DIR), default=None, metavar='DIR',
+                        help="reuse outputs of unchanged maps from a content-addressed cache (default dir: tools/.map_cache)")
+    parser.add_argument('--incremental', nargs='?', const=str(DEFAULT_INCREMENTAL_DIR), default=None, metavar='DIR',
+                        help="re-match only the neighbourhood of groups changed since the previous run (default dir: tools/.map_cache/incremental)")
+    parser.add_argument('--minify', nargs='?', type=int, const=2, default=None, metavar='PRECISION',
+                        help="round coordinates to PRECISION decimals (default: 2) and drop redundant attributes and whitespace")
+    parser.add_argument('--precompress', action='store_true',
+                        help="also write .svg.gz (and .svg.br when brotli is installed) next to each output")
+    parser.add_argument('--node-index', action='store_true',
+                        help="also write <output>.nodes.json with each node's id, number, label, type, bbox and document slug")
+    parser.add_argument('--tiles', nargs='?', type=int, const=DEFAULT_TILE_LEVELS, default=None, metavar='LEVELS',
+                        help="also split each output into <output>.tiles/ with LEVELS zoom levels (default: 3) and a manifest")
+    parser.add_argument('--palette', default=str(DEFAULT_PALETTE_PATH), metavar='PATH',
+                        help="JSON palette mapping node types to fill colors (default: tools/palette.json)")
+    parser.add_argument('--variants', nargs='?', const=str(DEFAULT_VARIANTS_PATH), default=None, metavar='PATH',
+                        help="also write each theme variant in PATH (default: tools/variants.json) next to the output")
+    parser.add_argument('--documents-dir', default=str(DEFAULT_DOCUMENTS_DIR), metavar='DIR',
+                        help="documents used to resolve node labels to slugs (default: documents/)")
+    parser.add_argument('--extract-fonts', metavar='DIR',
+                        help="move embedded @font-face data into content-hashed files in DIR")
+    parser.add_argument('--font-url-prefix', metavar='PREFIX',
+                        help="URL prefix for extracted fonts (default: root-relative URL of DIR under website/public;"
+                             " required when DIR is elsewhere)")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep running and regenerate each map shortly after its input changes")
+    parser.add_argument('--debounce', type=float, default=DEFAULT_WATCH_DEBOUNCE_SECONDS, metavar='SECONDS',
+                        help="quiet period after the last save before a watched map is rebuilt (default: 0.5)")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="record per-stage timings, counters and peak memory to PATH (batches then run in-process)")
+    parser.add_argument('--profile-format', choices=PROFILE_FORMATS, default='json',
+                        help="'json' for the stage profile or 'cprofile' for a pstats dump (default: json)")
+    arguments = parser.parse_args()
+    if arguments.minify is not None and arguments.minify < 0:
+        parser.error("--minify precision must be zero or positive")
+    if arguments.extract_fonts and arguments.font_url_prefix is None and public_url_path(arguments.extract_fonts) is None:
+        parser.error("--font-url-prefix is required when --extract-fonts is outside website/public")
+    return arguments
+
+def public_url_path(path):
+    try:
+        relative_path = Path(path).resolve().relative_to(WEBSITE_PUBLIC_DIR.resolve())
+    except ValueError:
+        return None
+    return '/' + '/'.join(relative_path.parts)
+
+def output_options_from_arguments(arguments):
+    font_url_prefix = arguments.font_url_prefix
+    if arguments.extract_fonts and font_url_prefix is None:
+        font_url_prefix = public_url_path(arguments.extract_fonts).rstrip('/') + '/'
+    return OutputOptions(fonts_dir=arguments.extract_fonts, font_url_prefix=font_url_prefix or '',
+                         precision=arguments.minify, precompress=arguments.precompress,
+                         node_index=arguments.node_index, documents_dir=arguments.documents_dir,
+                         tile_levels=arguments.tiles, palette_path=arguments.palette,
+                         variants_path=arguments.variants)
+
+def jobs_from_arguments(arguments, output_dir):
+    jobs = batch_jobs_from_globs(arguments.inputs, output_dir)
+    if arguments.manifest:
+        jobs += batch_jobs_from_manifest(arguments.manifest, output_dir)
+    return check_unique_outputs(jobs)
+
+def conversion_options_from_arguments(arguments):
+    return dict(engine=arguments.engine, streaming=arguments.stream, cache_dir=arguments.cache,
+                output_options=output_options_from_arguments(arguments), incremental_dir=arguments.incremental,
+                xml_backend_name=arguments.xml_backend)
+
+def run_batch_from_arguments(arguments, output_dir):
+    jobs = jobs_from_arguments(arguments, output_dir)
+    conversion_options = conversion_options_from_arguments(arguments)
+    if arguments.profile:
+        results = run_batch_in_process(jobs, **conversion_options)
+    else:
+        results = run_batch(jobs, arguments.jobs, **conversion_options)
+    for result in results:
+        print(result.summary())
+    return 1 if any(result.error for result in results) else 0
 
 if __name__ == "__main__":
+    arguments = parse_arguments()
     script_dir = Path(__file__).parent
     repo_root = script_dir.parent
 
+    output_dir = Path(arguments.output_dir) if arguments.output_dir else repo_root / "website" / "public" / "maps"
     input_svg = repo_root / "website" / "app" / "talk" / "map.svg"
-    output_dir = repo_root / "website" / "public" / "maps"
-    output_dir.mkdir(parents=True, exist_ok=True)
-    semantic_svg = output_dir / "semantic_map.svg"
 
-    save_semantic_map(str(input_svg), str(semantic_svg))
+    if arguments.watch:
+        if arguments.inputs or arguments.manifest:
+            jobs = jobs_from_arguments(arguments, output_dir)
+        else:
+            jobs = [(input_svg, semantic_output_path(input_svg, output_dir))]
+        MapWatcher(jobs, arguments.debounce, **conversion_options_from_arguments(arguments)).run()
+        sys.exit(0)
+
+    if arguments.inputs or arguments.manifest:
+        run = functools.partial(run_batch_from_arguments, arguments, output_dir)
+    else:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        semantic_svg = semantic_output_path(input_svg, output_dir)
+
+        run = functools.partial(save_semantic_map, str(input_svg), str(semantic_svg),
+                                **conversion_options_from_arguments(arguments))
+
+    if arguments.profile:
+        result = run_profiled(run, arguments.profile, arguments.profile_format)
+    else:
+        result = run()
+
+    if arguments.inputs or arguments.manifest:
+        sys.exit(result)
@@ -0,0 +1,142 @@
+import argparse
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+DEFAULT_DOCUMENTS_DIR = REPO_ROOT / 'documents'
+DEFAULT_INDEX_NAME = 'relationships.index.json'
+INDEX_VERSION = 1
+
+DOCUMENT_CATEGORIES = ['patterns', 'anti-patterns', 'obstacles']
+RELATIONSHIP_TYPES = ['related', 'solves', 'similar', 'enables', 'uses', 'causes', 'alternative']
+
+EDGE_PATTERN = re.compile(r'^([a-zA-Z0-9/_-]+)\s+(<-->|-->)\s*\|([^|]+)\|\s*([a-zA-Z0-9/_-]+)$')
+
+class Relationship:
+    __slots__ = ('source', 'target', 'type', 'bidirectional', 'line_number')
+
+    def __init__(self, source, target, relationship_type, bidirectional, line_number):
+        self.source = source
+        self.target = target
+        self.type = relationship_type
+        self.bidirectional = bidirectional
+        self.line_number = line_number
+
+def parse_relationships(content):
+    relationships = []
+    for line_number, line in enumerate(content.split('\n'), start=1):
+        line = line.strip()
+        if not line or line.startswith('%%') or line.startswith('graph '):
+            continue
+
+        match = EDGE_PATTERN.match(line)
+        if not match:
+            raise ValueError(f'Malformed relationship line at line {line_number}: "{line}". '
+                             f'Expected format: "A -->|type| B" or "A <-->|type| B"')
+        source, arrow, relationship_type, target = match.groups()
+        relationship_type = relationship_type.strip()
+        if relationship_type not in RELATIONSHIP_TYPES:
+            raise ValueError(f'Invalid relationship type: "{relationship_type}". Valid types are: {", ".join(RELATIONSHIP_TYPES)}')
+
+        bidirectional = arrow == '<-->'
+        relationships.append(Relationship(source, target, relationship_type, bidirectional, line_number))
+        if bidirectional:
+            relationships.append(Relationship(target, source, relationship_type, bidirectional, line_number))
+    return relationships
+
+def document_slugs(documents_dir):
+    return sorted(f"{category}/{path.stem}"
+                  for category in DOCUMENT_CATEGORIES
+                  for path in Path(documents_dir).glob(f"{category}/*.md"))
+
+def append_unique(lookup, key, value):
+    values = lookup.setdefault(key, [])
+    if value not in values:
+        values.append(value)
+
+def compile_relationship_index(content, slugs):
+    relationships = parse_relationships(content)
+
+    outgoing, incoming, solves, solved_by, related = {}, {}, {}, {}, {}
+    for relationship in relationships:
+        append_unique(outgoing.setdefault(relationship.source, {}), relationship.type, relationship.target)
+        append_unique(incoming.setdefault(relationship.target, {}), relationship.type, relationship.source)
+        append_unique(related, relationship.source, relationship.target)
+        append_unique(related, relationship.target, relationship.source)
+        if relationship.type == 'solves':
+            append_unique(solves, relationship.source, relationship.target)
+            append_unique(solved_by, relationship.target, relationship.source)
+
+    degree = {slug: {'out': sum(map(len, outgoing.get(slug, {}).values())),
+                     'in': sum(map(len, incoming.get(slug, {}).values()))}
+              for slug in sorted(set(slugs) | set(outgoing) | set(incoming))}
+
+    return {
+        'version': INDEX_VERSION,
+        'source_sha256': hashlib.sha256(content.encode('utf-8')).hexdigest(),
+        'types': RELATIONSHIP_TYPES,
+        'documents': sorted(slugs),
+        'relationships': [[relationship.source, relationship.target, relationship.type,
+                           relationship.bidirectional, relationship.line_number]
+                          for relationship in relationships],
+        'outgoing': outgoing,
+        'incoming': incoming,
+        'degree': degree,
+        'solves': solves,
+        'solved_by': solved_by,
+        'related': related,
+    }
+
+def validate_relationship_index(index):
+    documents = set(index['documents'])
+    unknown_sources = set(index['outgoing']) - documents
+    unknown_targets = set(index['incoming']) - documents
+
+    errors = []
+    for source, target, _, _, line_number in index['relationships']:
+        if source in unknown_sources:
+            errors.append(('invalid-source', source, line_number))
+            unknown_sources.discard(source)
+        if target in unknown_targets:
+            errors.append(('invalid-target', target, line_number))
+            unknown_targets.discard(target)
+    return errors
+
+def build_relationship_index(documents_dir=DEFAULT_DOCUMENTS_DIR):
+    documents_dir = Path(documents_dir)
+    content = (documents_dir / 'relationships.mmd').read_bytes().decode('utf-8')
+    return compile_relationship_index(content, document_slugs(documents_dir))
+
+def write_relationship_index(index, output_path):
+    output_path = Path(output_path)
+    output_path.write_text(json.dumps(index, separators=(',', ':')) + "\n", encoding='utf-8')
+    return output_path
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Compile documents/relationships.mmd into a prebuilt relationship index.")
+    parser.add_argument('--documents-dir', default=str(DEFAULT_DOCUMENTS_DIR), metavar='DIR',
+                        help="directory holding relationships.mmd and the category folders (default: documents/)")
+    parser.add_argument('--output', metavar='PATH',
+                        help=f"where to write the index (default: <documents-dir>/{DEFAULT_INDEX_NAME})")
+    parser.add_argument('--check', action='store_true',
+                        help="only validate that every relationship endpoint is an existing document")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    index = build_relationship_index(arguments.documents_dir)
+
+    errors = validate_relationship_index(index)
+    for kind, slug, line_number in errors:
+        print(f'{kind}: "{slug}" (line {line_number})', file=sys.stderr)
+    if errors:
+        sys.exit(1)
+
+    if not arguments.check:
+        output_path = Path(arguments.output) if arguments.output else Path(arguments.documents_dir) / DEFAULT_INDEX_NAME
+        write_relationship_index(index, output_path)
+        print(f"Relationship index saved to: {output_path}")
+    print(f"{len(index['relationships'])} relationships across {len(index['documents'])} documents are valid")
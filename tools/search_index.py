@@ -0,0 +1,150 @@
+import argparse
+import bisect
+import json
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from process_map import DEFAULT_DOCUMENTS_DIR, DOCUMENT_CATEGORIES, document_title
+
+DEFAULT_SEARCH_INDEX_PATH = Path(__file__).parent.parent / 'website' / 'public' / 'search-index.json'
+SEARCH_INDEX_VERSION = 1
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+FRONT_MATTER_PATTERN = re.compile(r'\A---\n(.*?)\n---\n?', re.DOTALL)
+FRONT_MATTER_FIELD_PATTERN = re.compile(r'^(\w+):\s*(.*)$', re.MULTILINE)
+TITLE_WEIGHT = 10
+PREFIX_LENGTHS = (2, 3)
+MIN_TRIGRAM_SIMILARITY = 0.4
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.casefold()) if len(token) > 1]
+
+def term_trigrams(term):
+    padded = f" {term} "
+    return {padded[start:start + 3] for start in range(len(padded) - 2)}
+
+def split_front_matter(markdown):
+    match = FRONT_MATTER_PATTERN.match(markdown)
+    if not match:
+        return {}, markdown
+    return dict(FRONT_MATTER_FIELD_PATTERN.findall(match.group(1))), markdown[match.end():]
+
+def read_document(path):
+    markdown = path.read_text(encoding='utf-8')
+    front_matter, body = split_front_matter(markdown)
+    title = front_matter.get('title') or document_title(markdown) or path.stem
+    weights = Counter(tokenize(body))
+    for token in tokenize(title):
+        weights[token] += TITLE_WEIGHT
+    return {
+        'slug': f"{path.parent.name}/{path.stem}",
+        'title': title,
+        'category': path.parent.name,
+        'weights': weights,
+    }
+
+def document_paths(documents_dir):
+    return [path for category in DOCUMENT_CATEGORIES.values()
+            for path in sorted(Path(documents_dir).glob(f"{category}/*.md"))]
+
+def read_documents(documents_dir, workers=None):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read_document, document_paths(documents_dir)))
+
+def build_search_index(documents):
+    postings = {}
+    for document_id, document in enumerate(documents):
+        for term, weight in document['weights'].items():
+            postings.setdefault(term, []).append([document_id, weight])
+
+    terms = sorted(postings)
+    prefixes = {}
+    trigrams = {}
+    for term_id, term in enumerate(terms):
+        for length in PREFIX_LENGTHS:
+            if len(term) >= length:
+                prefixes.setdefault(term[:length], [term_id, term_id])[1] = term_id + 1
+        for trigram in term_trigrams(term):
+            trigrams.setdefault(trigram, []).append(term_id)
+
+    return {
+        'version': SEARCH_INDEX_VERSION,
+        'documents': [[document['slug'], document['title'], document['category']] for document in documents],
+        'terms': terms,
+        'postings': [postings[term] for term in terms],
+        'prefixes': prefixes,
+        'trigrams': trigrams,
+    }
+
+def prefix_term_ids(index, prefix):
+    terms = index['terms']
+    start, end = index['prefixes'].get(prefix[:max(PREFIX_LENGTHS)], (0, 0))
+    first = bisect.bisect_left(terms, prefix, start, end)
+    last = first
+    while last < end and terms[last].startswith(prefix):
+        last += 1
+    return range(first, last)
+
+def fuzzy_term_ids(index, term):
+    wanted = term_trigrams(term)
+    shared = Counter(term_id for trigram in wanted for term_id in index['trigrams'].get(trigram, []))
+    return [term_id for term_id, count in shared.items()
+            if count / len(wanted | term_trigrams(index['terms'][term_id])) >= MIN_TRIGRAM_SIMILARITY]
+
+def query_term_ids(index, token, is_prefix):
+    term_ids = prefix_term_ids(index, token) if is_prefix else []
+    if not term_ids:
+        position = bisect.bisect_left(index['terms'], token)
+        if position < len(index['terms']) and index['terms'][position] == token:
+            term_ids = [position]
+    return term_ids or fuzzy_term_ids(index, token)
+
+def search(index, query, limit=None):
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+
+    scores = None
+    for position, token in enumerate(tokens):
+        token_scores = Counter()
+        for term_id in query_term_ids(index, token, is_prefix=position == len(tokens) - 1):
+            for document_id, weight in index['postings'][term_id]:
+                token_scores[document_id] += weight
+        scores = token_scores if scores is None else Counter({document_id: score + token_scores[document_id]
+                                                              for document_id, score in scores.items()
+                                                              if document_id in token_scores})
+
+    ranked = sorted(scores, key=lambda document_id: (-scores[document_id], document_id))
+    return [index['documents'][document_id][0] for document_id in ranked[:limit]]
+
+def write_search_index(index, output_path):
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(index, separators=(',', ':')) + "\n", encoding='utf-8')
+    return output_path
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Build a prebuilt full-text search index over documents/.")
+    parser.add_argument('--documents-dir', default=str(DEFAULT_DOCUMENTS_DIR), metavar='DIR',
+                        help="documents to index (default: documents/)")
+    parser.add_argument('--output', default=str(DEFAULT_SEARCH_INDEX_PATH), metavar='PATH',
+                        help="where to write the index (default: website/public/search-index.json)")
+    parser.add_argument('--workers', type=int, default=min(32, (os.cpu_count() or 1) + 4),
+                        help="threads used to read and tokenize documents")
+    parser.add_argument('--query', help="print the slugs matching QUERY against the freshly built index")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    index = build_search_index(read_documents(arguments.documents_dir, arguments.workers))
+
+    if arguments.query:
+        for slug in search(index, arguments.query):
+            print(slug)
+    else:
+        output_path = write_search_index(index, arguments.output)
+        print(f"Search index saved to: {output_path}")
+        print(f"Indexed {len(index['terms'])} terms across {len(index['documents'])} documents")
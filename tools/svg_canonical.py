@@ -0,0 +1,110 @@
+import functools
+import hashlib
+import re
+
+CANONICAL_PRECISION = 6
+CANONICAL_NUMBER_PATTERN = re.compile(r'#[0-9a-fA-F]+\b|(?<![\d.])[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?![\d.])')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+@functools.lru_cache(maxsize=65536)
+def canonical_number_text(number):
+    value = round(float(number), CANONICAL_PRECISION)
+    text = f"{value:.{CANONICAL_PRECISION}f}".rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+def canonical_number(match):
+    number = match.group(0)
+    return number if number.startswith('#') else canonical_number_text(number)
+
+@functools.lru_cache(maxsize=65536)
+def canonical_text(text):
+    if not text:
+        return ''
+    return CANONICAL_NUMBER_PATTERN.sub(canonical_number, WHITESPACE_PATTERN.sub(' ', text).strip())
+
+def canonical_attributes(element):
+    return sorted((key, canonical_text(value)) for key, value in element.items())
+
+def node_digest(element, child_digests):
+    attributes = ''.join(f"\0{key}={value}" for key, value in canonical_attributes(element))
+    digest = hashlib.blake2b(f"{element.tag}{attributes}\0text={canonical_text(element.text)}".encode('utf-8'), digest_size=16)
+    for child, child_digest in zip(element, child_digests):
+        digest.update(child_digest)
+        tail = canonical_text(child.tail)
+        if tail:
+            digest.update(f"\0tail={tail}".encode('utf-8'))
+    return digest.digest()
+
+class SubtreeHashes:
+    def __init__(self, root):
+        self.root = root
+        self.digests = {}
+        pending = [(root, False)]
+        while pending:
+            element, children_done = pending.pop()
+            if children_done:
+                self.digests[element] = node_digest(element, [self.digests[child] for child in element])
+            else:
+                pending.append((element, True))
+                pending.extend((child, False) for child in element)
+
+    def __getitem__(self, element):
+        return self.digests[element]
+
+    def hexdigest(self, element=None):
+        return self[self.root if element is None else element].hex()
+
+def subtree_hash(element):
+    return SubtreeHashes(element).hexdigest()
+
+def local_name(tag):
+    return tag.split('}')[-1]
+
+def node_label(element, index):
+    label = f"{local_name(element.tag)}[{index}]"
+    for key in ('id', 'data-label', 'class'):
+        if element.get(key):
+            return f"{label}[@{key}={element.get(key)!r}]"
+    return label
+
+def describe_node_change(path, expected, actual):
+    if expected.tag != actual.tag:
+        return [f"{path}: tag {local_name(expected.tag)!r} != {local_name(actual.tag)!r}"]
+
+    changes = []
+    expected_attributes, actual_attributes = dict(canonical_attributes(expected)), dict(canonical_attributes(actual))
+    for key in sorted(expected_attributes.keys() | actual_attributes.keys()):
+        if expected_attributes.get(key) != actual_attributes.get(key):
+            changes.append(f"{path}: @{key} {expected.get(key)!r} != {actual.get(key)!r}")
+    if canonical_text(expected.text) != canonical_text(actual.text):
+        changes.append(f"{path}: text {expected.text!r} != {actual.text!r}")
+    if len(expected) != len(actual):
+        changes.append(f"{path}: {len(expected)} children != {len(actual)}")
+    return changes
+
+def diff_subtrees(expected_root, actual_root, limit=20):
+    expected_hashes, actual_hashes = SubtreeHashes(expected_root), SubtreeHashes(actual_root)
+    differences = []
+    pending = [(local_name(expected_root.tag), expected_root, actual_root)]
+    while pending and len(differences) < limit:
+        path, expected, actual = pending.pop()
+        if expected_hashes[expected] == actual_hashes[actual]:
+            continue
+
+        changes = describe_node_change(path, expected, actual)
+        differences.extend(changes)
+        if changes:
+            continue
+
+        child_pairs = list(enumerate(zip(expected, actual)))
+        for index, (expected_child, actual_child) in reversed(child_pairs):
+            if canonical_text(expected_child.tail) != canonical_text(actual_child.tail):
+                differences.append(f"{path}/{node_label(expected_child, index)}: tail {expected_child.tail!r} != {actual_child.tail!r}")
+            pending.append((f"{path}/{node_label(expected_child, index)}", expected_child, actual_child))
+    return differences[:limit]
+
+def describe_differences(expected_root, actual_root, limit=20):
+    differences = diff_subtrees(expected_root, actual_root, limit)
+    if not differences:
+        return "Canonical trees are equal; the difference is in serialization only"
+    return "\n".join(differences)
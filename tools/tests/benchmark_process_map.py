@@ -0,0 +1,92 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import xml.etree.ElementTree as ET
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "tools"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from process_map import load_svg_tree, scan_svg, identify_map_elements, restructure_svg, save_svg_tree
+from svg_fixtures import create_synthetic_map
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+
+def timed(stage_timings, stage, action):
+    start = time.perf_counter()
+    result = action()
+    stage_timings[stage] = time.perf_counter() - start
+    return result
+
+
+def benchmark_map(node_count, seed=0, engine='greedy'):
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = Path(directory) / "map.svg"
+        output_path = Path(directory) / "semantic_map.svg"
+        ET.ElementTree(create_synthetic_map(node_count, seed)).write(str(input_path))
+
+        stages = {}
+        tree, root = timed(stages, 'parse', lambda: load_svg_tree(str(input_path)))
+        scan = timed(stages, 'scan', lambda: scan_svg(root))
+        map_elements = timed(stages, 'identify_map_elements', lambda: identify_map_elements(root, engine, scan))
+        timed(stages, 'restructure_svg', lambda: restructure_svg(root, map_elements, scan))
+        timed(stages, 'write', lambda: save_svg_tree(tree, str(output_path)))
+
+        total = sum(stages.values())
+        return {
+            'nodes': node_count,
+            'seed': seed,
+            'engine': engine,
+            'input_bytes': input_path.stat().st_size,
+            'interactive': map_elements.interactive_count(),
+            'legend': map_elements.legend_count(),
+            'stages': stages,
+            'total': total,
+            'nodes_per_second': node_count / total if total else None,
+        }
+
+
+def run_benchmarks(sizes, seed=0, engine='greedy'):
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': [benchmark_map(size, seed, engine) for size in sizes],
+    }
+
+
+def append_run(output_path, run):
+    output_path = Path(output_path)
+    history = json.loads(output_path.read_text()) if output_path.exists() else []
+    history.append(run)
+    output_path.write_text(json.dumps(history, indent=2) + "\n")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Time each stage of the semantic map pipeline on synthetic maps.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="node counts to benchmark (default: 100 1000 10000 100000)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the synthetic map generator")
+    parser.add_argument('--engine', default='greedy', help="label matching engine to benchmark")
+    parser.add_argument('--output', help="JSON file to append this run to, for tracking trends across changes")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    run = run_benchmarks(arguments.sizes, arguments.seed, arguments.engine)
+
+    for result in run['results']:
+        stages = ', '.join(f"{stage} {seconds:.3f}s" for stage, seconds in result['stages'].items())
+        print(f"{result['nodes']:>7} nodes: {stages} ({result['nodes_per_second']:.0f} nodes/s)")
+
+    if arguments.output:
+        append_run(arguments.output, run)
+    else:
+        print(json.dumps(run, indent=2))
@@ -1,3 +1,5 @@
+import math
+import random
 import xml.etree.ElementTree as ET
 
 def create_shape_group(x, y, color):
@@ -64,3 +66,56 @@ def create_minimal_svg():
     root.append(create_text_group(155, 855, 'Pit Stop'))
 
     return root
+
+SYNTHETIC_NODE_SPACING = 250
+SYNTHETIC_NODE_COLORS = ['#b2f2bb', '#ffc9c9', '#ffec99']
+SYNTHETIC_WORDS = ['Context', 'Knowledge', 'Agent', 'Feedback', 'Loop', 'Chunking', 'Canary', 'Noise',
+                   'Reference', 'Focus', 'Prototype', 'Checkpoint', 'Document', 'Ground', 'Rules', 'Semantic']
+
+def create_legend_groups(x, y):
+    groups = []
+    for offset, (color, label) in enumerate([('#ffc9c9', 'Obstacle'), ('#ffec99', 'Anti-Pattern'),
+                                             ('#b2f2bb', 'Pattern'), ('#a5d8ff', 'Pit Stop')]):
+        groups.append(create_shape_group(x, y + offset * 100, color))
+        groups.append(create_text_group(x + 10, y + offset * 100 + 5, label))
+    return groups
+
+def create_synthetic_map(node_count, seed=0, number_ratio=0.5, multi_line_ratio=0.3, jitter=15):
+    rng = random.Random(seed)
+    svg_ns = "http://www.w3.org/2000/svg"
+    ET.register_namespace('', svg_ns)
+
+    columns = max(1, math.ceil(math.sqrt(node_count)))
+    rows = math.ceil(node_count / columns)
+    width = columns * SYNTHETIC_NODE_SPACING + 400
+    height = rows * SYNTHETIC_NODE_SPACING + 100
+
+    root = ET.Element(f'{{{svg_ns}}}svg')
+    root.set('viewBox', f'0 0 {width} {height}')
+    background = ET.SubElement(root, f'{{{svg_ns}}}rect')
+    background.set('x', '0')
+    background.set('y', '0')
+    background.set('width', str(width))
+    background.set('height', str(height))
+    background.set('fill', '#ffffff')
+
+    for node in range(node_count):
+        x = 400 + (node % columns) * SYNTHETIC_NODE_SPACING + rng.uniform(-jitter, jitter)
+        y = 50 + (node // columns) * SYNTHETIC_NODE_SPACING + rng.uniform(-jitter, jitter)
+        root.append(create_shape_group(x, y, rng.choice(SYNTHETIC_NODE_COLORS)))
+
+        label_x = x + 5 + rng.uniform(-jitter, jitter)
+        label_y = y + 5 + rng.uniform(-jitter, jitter)
+        first_word, second_word = rng.sample(SYNTHETIC_WORDS, 2)
+        if rng.random() < multi_line_ratio:
+            root.append(create_multi_line_text_group(label_x, label_y, f'{first_word} ', f'{second_word} {node}'))
+        else:
+            root.append(create_text_group(label_x, label_y, f'{first_word} {second_word} {node}'))
+
+        if rng.random() < number_ratio:
+            root.append(create_text_group(x - 30 + rng.uniform(-5, 5), y - 10 + rng.uniform(-5, 5), str(node + 1)))
+
+    for group in create_legend_groups(50, 50):
+        root.append(group)
+
+    return root
@@ -4,9 +4,11 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root / "tools"))
 
-from process_map import Position, SvgShape, SvgText, MapElement, MapElements, identify_shapes_from_svg, identify_labels_from_svg, match_nearest_label, build_map_elements, calculate_distance, separate_legend_items, map_element_to_svg_group, identify_map_elements, load_svg_tree, save_svg_tree, restructure_svg
-from svg_fixtures import create_shape_group, create_text_group, create_multi_line_text_group
+import process_map
+from process_map import Position, SvgShape, SvgText, MapElement, MapElements, LabelIndex, PositionColumns, identify_shapes_from_svg, identify_labels_from_svg, match_nearest_label, build_map_elements, build_map_elements_by_assignment, calculate_distance, separate_legend_items, map_element_to_svg_group, identify_map_elements, load_svg_tree, save_svg_tree, restructure_svg, scan_svg, stream_semantic_map, write_semantic_map, format_number, minify_transform, parse_transform, apply_matrix, postprocess_output, round_numbers, OutputOptions, OutputReport, path_points, shape_bbox, document_title, resolve_document, element_points, points_bounds, DocumentResolver, Palette, using_palette, MapVariant, SpooledElement
+from svg_fixtures import create_shape_group, create_text_group, create_multi_line_text_group, create_minimal_svg
 import xml.etree.ElementTree as ET
+import pytest
 
 
 def test_position_stores_coordinates():
@@ -121,6 +123,34 @@ def test_map_element_determines_pitstop_from_color():
     element = MapElement(shape)
 
     assert element.node_type == 'pitstop'
+
+
+def test_map_element_classifies_color_variants_by_nearest_palette_entry():
+    assert MapElement(SvgShape("shape_elem", Position(0, 0), "#FFCACA")).node_type == 'obstacle'
+    assert MapElement(SvgShape("shape_elem", Position(0, 0), "rgb(178, 242, 187)")).node_type == 'pattern'
+    assert MapElement(SvgShape("shape_elem", Position(0, 0), "#e9ecef")).node_type == 'unknown'
+    assert MapElement(SvgShape("shape_elem", Position(0, 0), "url(#gradient)")).node_type == 'unknown'
+
+
+def test_palette_memoizes_each_distinct_fill():
+    palette = Palette({'pattern': ['#b2f2bb'], 'obstacle': ['#ffc9c9']}, max_distance=15)
+
+    types = [palette.classify(fill) for fill in ['#b2f2bb', '#ffc9c9', '#b2f2bb', '#000000']]
+
+    assert types == ['pattern', 'obstacle', 'pattern', 'unknown']
+    assert palette.lookup == {'#b2f2bb': 'pattern', '#ffc9c9': 'obstacle', '#000000': 'unknown'}
+
+
+def test_active_palette_retypes_map_elements():
+    palette = Palette({'pattern': ['#ffc9c9']}, max_distance=15)
+
+    with using_palette(palette):
+        element = MapElement(SvgShape("shape_elem", Position(0, 0), "#ffc9c9"))
+
+    assert element.node_type == 'pattern'
+    assert MapElement(SvgShape("shape_elem", Position(0, 0), "#ffc9c9")).node_type == 'obstacle'
+
+
 def test_map_element_with_no_texts_has_none_name():
     shape = SvgShape("shape", Position(0, 0), "#b2f2bb")
 
@@ -276,6 +306,21 @@ def test_build_map_elements_creates_element_with_matched_labels():
     assert elements[0].node_type == 'pattern'
 
 
+@pytest.mark.parametrize("builder", [build_map_elements, build_map_elements_by_assignment])
+def test_build_map_elements_loads_the_palette_once(monkeypatch, builder):
+    if builder is build_map_elements_by_assignment:
+        pytest.importorskip("numpy")
+    load_palette, loads = process_map.load_palette, []
+    monkeypatch.setattr(process_map, 'load_palette', lambda: loads.append(1) or load_palette())
+    shapes = [SvgShape(f"shape{index}", Position(index * 100, 0), '#b2f2bb') for index in range(5)]
+    labels = [SvgText(f"text{index}", Position(index * 100 + 5, 5), f"Pattern {index}") for index in range(5)]
+
+    elements = builder(shapes, labels)
+
+    assert len(elements) == 5
+    assert len(loads) == 1
+
+
 def test_build_map_elements_separates_name_from_number():
     shape = SvgShape("shape", Position(500, 300), '#b2f2bb')
     name1 = SvgText("t1", Position(505, 305), 'Knowledge')
@@ -598,3 +643,383 @@ def test_restructure_svg_removes_original_elements_and_adds_semantic_groups():
     assert new_child_count > 0
     groups_with_class = [child for child in root if 'class' in child.attrib]
     assert len(groups_with_class) > 0
+
+
+def test_label_index_finds_nearest_label_within_distance():
+    far_label = SvgText("text1", Position(110, 105), "Far Label")
+    close_label = SvgText("text2", Position(102, 101), "Close Label")
+    index = LabelIndex([far_label, close_label], 150)
+
+    matched, distance = index.nearest(100, 100, 150)
+
+    assert matched == 1
+    assert distance == calculate_distance(100, 100, 102, 101)
+
+
+def test_label_index_searches_neighbouring_cells():
+    label = SvgText("text", Position(149, 0), "Across Cell Border")
+    index = LabelIndex([label], 100)
+
+    matched, _ = index.nearest(51, 0, 100)
+
+    assert matched == 0
+
+
+def test_label_index_returns_none_when_too_far():
+    label = SvgText("text", Position(300, 300), "Far Label")
+    index = LabelIndex([label], 50)
+
+    matched, distance = index.nearest(100, 100, 50)
+
+    assert matched is None
+    assert distance == float('inf')
+
+
+def test_label_index_prefers_earlier_label_on_equal_distance():
+    first = SvgText("text1", Position(110, 100), "First")
+    second = SvgText("text2", Position(90, 100), "Second")
+    index = LabelIndex([second, first], 150)
+
+    matched, _ = index.nearest(100, 100, 150)
+
+    assert matched == 0
+
+
+def test_label_index_skips_removed_labels():
+    close_label = SvgText("text1", Position(102, 101), "Close Label")
+    far_label = SvgText("text2", Position(110, 105), "Far Label")
+    index = LabelIndex([close_label, far_label], 150)
+
+    index.remove(0)
+    matched, _ = index.nearest(100, 100, 150)
+
+    assert matched == 1
+
+
+def test_position_columns_store_coordinates_in_parallel_arrays():
+    labels = [SvgText("a", Position(1.5, 2.5), "A"), SvgText("b", Position(4.5, 6.5), "B")]
+
+    columns = PositionColumns(labels)
+
+    assert list(columns.xs) == [1.5, 4.5]
+    assert list(columns.ys) == [2.5, 6.5]
+    assert columns.distance(1, 1.5, 2.5) == 5.0
+
+
+def test_geometry_classes_have_no_instance_dict():
+    shape = SvgShape("shape", Position(0, 0), "#b2f2bb")
+
+    assert not hasattr(shape, '__dict__')
+    assert not hasattr(shape.position, '__dict__')
+    assert not hasattr(MapElement(shape), '__dict__')
+
+
+def test_assignment_engine_matches_names_and_numbers():
+    pytest.importorskip("numpy")
+    shape = SvgShape("shape", Position(500, 300), '#b2f2bb')
+    name_label = SvgText("text1", Position(505, 305), 'Context Management')
+    number_label = SvgText("text2", Position(498, 318), '1')
+
+    elements = build_map_elements_by_assignment([shape], [name_label, number_label])
+
+    assert len(elements) == 1
+    assert elements[0].shape == shape
+    assert elements[0].name == 'Context Management'
+    assert elements[0].number == number_label
+
+
+def test_assignment_engine_minimizes_total_distance():
+    pytest.importorskip("numpy")
+    shape_left = SvgShape("s_left", Position(0, 0), '#b2f2bb')
+    shape_right = SvgShape("s_right", Position(100, 0), '#b2f2bb')
+    label_middle = SvgText("l_middle", Position(60, 0), 'Middle')
+    label_far = SvgText("l_far", Position(-100, 0), 'Far')
+
+    elements = build_map_elements_by_assignment([shape_left, shape_right], [label_middle, label_far])
+
+    elements_by_name = {e.name: e for e in elements}
+    assert elements_by_name['Middle'].shape == shape_right
+    assert elements_by_name['Far'].shape == shape_left
+
+
+def test_assignment_engine_leaves_labels_beyond_cutoff_unmatched():
+    pytest.importorskip("numpy")
+    shape = SvgShape("shape", Position(100, 100), '#b2f2bb')
+    label = SvgText("text", Position(400, 400), 'Far Label')
+
+    elements = build_map_elements_by_assignment([shape], [label])
+
+    assert elements == []
+
+
+def test_scan_svg_collects_shapes_and_labels_in_document_order():
+    svg_ns = "{http://www.w3.org/2000/svg}"
+    root = ET.Element(f'{svg_ns}svg')
+    nested = ET.SubElement(root, f'{svg_ns}g')
+    nested.append(create_shape_group(100, 100, '#b2f2bb'))
+    root.append(create_text_group(105, 105, 'Context Management'))
+    root.append(create_shape_group(300, 300, '#ffc9c9'))
+
+    scan = scan_svg(root)
+
+    assert [shape.position.x for shape in scan.shapes] == [100, 300]
+    assert [label.content for label in scan.labels] == ['Context Management']
+
+
+def test_scan_svg_records_parents_of_collected_elements():
+    svg_ns = "{http://www.w3.org/2000/svg}"
+    root = ET.Element(f'{svg_ns}svg')
+    nested = ET.SubElement(root, f'{svg_ns}g')
+    shape_group = create_shape_group(100, 100, '#b2f2bb')
+    nested.append(shape_group)
+
+    scan = scan_svg(root)
+
+    assert scan.parents[shape_group] is nested
+    assert nested not in scan.parents
+
+
+def test_scan_svg_finds_white_background_rectangle():
+    svg_ns = "{http://www.w3.org/2000/svg}"
+    root = ET.Element(f'{svg_ns}svg')
+    background = ET.SubElement(root, f'{svg_ns}rect', {'x': '0', 'y': '0', 'fill': '#ffffff'})
+
+    scan = scan_svg(root)
+
+    assert scan.background is background
+    assert scan.parents[background] is root
+
+
+def test_restructure_svg_reuses_scan_to_remove_background_and_originals():
+    svg_ns = "{http://www.w3.org/2000/svg}"
+    root = ET.Element(f'{svg_ns}svg')
+    ET.SubElement(root, f'{svg_ns}rect', {'x': '0', 'y': '0', 'fill': '#ffffff'})
+    root.append(create_shape_group(200, 200, '#b2f2bb'))
+    root.append(create_text_group(205, 205, 'Test Pattern'))
+    scan = scan_svg(root)
+    map_elements = identify_map_elements(root, scan=scan)
+
+    restructure_svg(root, map_elements, scan)
+
+    assert [child.get('class') for child in root] == ['interactive-node']
+
+
+def test_restructure_svg_keeps_unconsumed_siblings_in_order_inside_nested_parents():
+    svg_ns = "{http://www.w3.org/2000/svg}"
+    root = ET.Element(f'{svg_ns}svg')
+    ET.SubElement(root, f'{svg_ns}defs')
+    layer = ET.SubElement(root, f'{svg_ns}g')
+    ET.SubElement(layer, f'{svg_ns}line', {'id': 'before'})
+    layer.append(create_shape_group(200, 200, '#b2f2bb'))
+    layer.append(create_text_group(205, 205, 'Test Pattern'))
+    ET.SubElement(layer, f'{svg_ns}line', {'id': 'after'})
+    scan = scan_svg(root)
+    map_elements = identify_map_elements(root, scan=scan)
+
+    restructure_svg(root, map_elements, scan)
+
+    assert [child.tag.split('}')[-1] for child in root] == ['defs', 'g', 'g']
+    assert [child.get('id') for child in layer] == ['before', 'after']
+    assert root[2].get('class') == 'interactive-node'
+
+
+def test_stream_semantic_map_matches_in_memory_conversion(tmp_path):
+    svg_ns = "{http://www.w3.org/2000/svg}"
+    root = create_minimal_svg()
+    ET.SubElement(root, f'{svg_ns}rect', {'x': '0', 'y': '0', 'fill': '#ffffff'})
+    nested = ET.SubElement(root, f'{svg_ns}g')
+    nested.append(create_shape_group(700, 700, '#b2f2bb'))
+    nested.append(create_text_group(705, 705, 'Nested Pattern'))
+    root.append(create_text_group(900, 100, 'Unmatched'))
+    input_path = tmp_path / "map.svg"
+    ET.ElementTree(root).write(str(input_path))
+    in_memory_path = tmp_path / "in_memory.svg"
+    streamed_path = tmp_path / "streamed.svg"
+
+    in_memory_elements = write_semantic_map(str(input_path), str(in_memory_path))
+    streamed_elements = stream_semantic_map(str(input_path), str(streamed_path))
+
+    assert streamed_elements.interactive_count() == in_memory_elements.interactive_count()
+    assert streamed_elements.legend_count() == in_memory_elements.legend_count()
+    assert streamed_path.read_bytes() == in_memory_path.read_bytes()
+
+
+def test_stream_semantic_map_spools_matched_groups_instead_of_keeping_elements(tmp_path):
+    root = create_minimal_svg()
+    root.append(create_shape_group(100, 100, '#b2f2bb'))
+    root.append(create_text_group(105, 105, 'Spooled Pattern'))
+    input_path = tmp_path / "map.svg"
+    ET.ElementTree(root).write(str(input_path))
+
+    map_elements = stream_semantic_map(str(input_path), str(tmp_path / "streamed.svg"))
+
+    element = map_elements.interactive[0]
+    assert isinstance(element.shape.element, SpooledElement)
+    assert all(isinstance(text.element, SpooledElement) for text in element.texts)
+    assert 'Spooled Pattern' in (tmp_path / "streamed.svg").read_text()
+
+
+def test_format_number_rounds_and_trims_trailing_zeros():
+    assert format_number(1613.442674533279, 2) == '1613.44'
+    assert format_number(17.619999999999997, 2) == '17.62'
+    assert format_number(5.0, 2) == '5'
+    assert format_number(-0.001, 2) == '0'
+    assert format_number(250.0, 0) == '250'
+    assert format_number(-0.4, 0) == '0'
+    assert round_numbers('M10 20 L100 200', 0) == 'M10 20 L100 200'
+
+
+def test_minify_transform_drops_identity_rotation():
+    transform = 'translate(499.19268793790843 249.82141828777458) rotate(0 26.714469472573455 26.205729174382213)'
+
+    assert minify_transform(transform, 2) == 'translate(499.19 249.82)'
+
+
+def test_minify_transform_keeps_real_rotation():
+    transform = 'translate(10 20) rotate(134.21185909822276 5 5)'
+
+    assert minify_transform(transform, 1) == 'translate(10 20) rotate(134.2 5 5)'
+
+
+def test_minification_drops_attributes_equal_to_inherited_value():
+    svg_ns = "{http://www.w3.org/2000/svg}"
+    root = ET.Element(f'{svg_ns}svg')
+    group = ET.SubElement(root, f'{svg_ns}g', {'stroke-width': '2'})
+    default_path = ET.SubElement(root, f'{svg_ns}path', {'stroke-width': '1', 'd': 'M0.123 0.456'})
+    overriding_path = ET.SubElement(group, f'{svg_ns}path', {'stroke-width': '1'})
+    inherited_path = ET.SubElement(group, f'{svg_ns}path', {'stroke-width': '2'})
+    report = OutputReport()
+
+    postprocess_output(root, OutputOptions(precision=1), report)
+
+    assert default_path.attrib == {'d': 'M0.1 0.5'}
+    assert overriding_path.get('stroke-width') == '1'
+    assert 'stroke-width' not in inherited_path.attrib
+    assert report.bytes_saved == len(' stroke-width="1"') + len(' stroke-width="2"') + 4
+
+
+def test_minification_strips_whitespace_outside_text():
+    svg_ns = "{http://www.w3.org/2000/svg}"
+    root = ET.Element(f'{svg_ns}svg')
+    root.text = '\n  '
+    text = ET.SubElement(root, f'{svg_ns}text')
+    text.text = '  Pit Stop  '
+    text.tail = '\n'
+
+    postprocess_output(root, OutputOptions(precision=2), OutputReport())
+
+    assert root.text is None
+    assert text.tail is None
+    assert text.text == '  Pit Stop  '
+
+
+def test_parse_transform_composes_translate_and_identity_rotation_exactly():
+    matrix = parse_transform('translate(499.19268793790843 249.82141828777458) rotate(0 26.714469472573455 26.205729174382213)')
+
+    assert apply_matrix(matrix, 0, 0) == (499.19268793790843, 249.82141828777458)
+
+
+def test_parse_transform_supports_scale_rotate_and_matrix():
+    scaled = parse_transform('scale(2 3)')
+    rotated = parse_transform('rotate(90 10 10)')
+    explicit = parse_transform('matrix(1 0 0 1 5 -5)')
+
+    assert apply_matrix(scaled, 1, 1) == (2, 3)
+    assert [round(value, 9) for value in apply_matrix(rotated, 20, 10)] == [10, 20]
+    assert apply_matrix(explicit, 0, 0) == (5, -5)
+
+
+def test_scan_svg_composes_ancestor_transforms():
+    svg_ns = "{http://www.w3.org/2000/svg}"
+    root = ET.Element(f'{svg_ns}svg')
+    layer = ET.SubElement(root, f'{svg_ns}g', {'transform': 'translate(1000 50) scale(2)'})
+    layer.append(create_shape_group(100, 100, '#b2f2bb'))
+    layer.append(create_text_group(100, 100, 'Scaled Pattern'))
+
+    scan = scan_svg(root)
+
+    assert (scan.shapes[0].position.x, scan.shapes[0].position.y) == (1200, 250)
+    assert (scan.labels[0].position.x, scan.labels[0].position.y) == (1000 + 2 * 148.8, 50 + 2 * 117.6)
+
+
+def test_path_points_tracks_relative_and_axis_aligned_commands():
+    points = path_points('M10 10 l5 0 h5 v-10 c1 1, 2 2, 3 3 Z m2 2 L0 0')
+
+    assert points == [(10, 10), (15, 10), (20, 10), (20, 0), (21, 1), (22, 2), (23, 3), (12, 12), (0, 0)]
+
+
+def test_shape_bbox_covers_path_points_in_map_coordinates():
+    root = ET.Element('{http://www.w3.org/2000/svg}svg')
+    root.append(create_shape_group(100, 200, '#b2f2bb'))
+    root[0][0].set('d', 'M0 0 L40 0 L40 -10 Z')
+
+    shape = scan_svg(root).shapes[0]
+
+    assert shape_bbox(shape) == [100, 190, 40, 10]
+
+
+def test_element_points_follow_rotated_rects():
+    group = ET.Element('{http://www.w3.org/2000/svg}g')
+    group.set('transform', 'rotate(90)')
+    rect = ET.SubElement(group, '{http://www.w3.org/2000/svg}rect')
+    rect.set('width', '20')
+    rect.set('height', '10')
+
+    bounds = points_bounds(element_points(group))
+
+    assert bounds == pytest.approx((-10, 0, 0, 20))
+
+
+def test_document_title_drops_front_matter_category_suffix_and_emoji():
+    markdown = "---\nauthors: [someone]\n---\n\n# 🧠 Cannot Learn (Obstacle)\n\n## Description\n"
+
+    assert document_title(markdown) == 'Cannot Learn'
+
+
+def test_resolve_document_prefers_the_node_type_category():
+    titles = {'patterns': {'reminders': 'reminders'}, 'obstacles': {'reminders': 'reminders-obstacle', 'cannot learn': 'cannot-learn'}}
+
+    assert resolve_document('Reminders', 'pattern', titles) == ('patterns', 'reminders')
+    assert resolve_document('Cannot  learn', 'pattern', titles) == ('obstacles', 'cannot-learn')
+    assert resolve_document('Unknown', 'pattern', titles) == (None, None)
+
+
+def test_document_resolver_scores_misspelled_labels_by_trigram_similarity():
+    titles = {'patterns': {'context management': 'context-management', 'chunking': 'chunking'},
+              'obstacles': {'cannot learn': 'cannot-learn', 'limited context window': 'limited-context-window'}}
+    resolver = DocumentResolver(titles)
+
+    assert resolver.resolve('Cannot Learn', 'obstacle') == ('obstacles', 'cannot-learn', 1.0)
+    category, slug, confidence = resolver.resolve('Context Managment', 'pattern')
+    assert (category, slug) == ('patterns', 'context-management') and 0.5 <= confidence < 1.0
+    assert resolver.resolve('Banana Bread', 'pattern')[:2] == (None, None)
+
+
+def test_document_resolver_reports_unresolved_nodes_and_orphaned_documents():
+    resolver = DocumentResolver({'patterns': {'chunking': 'chunking', 'ground rules': 'ground-rules'}})
+    nodes = resolver.resolve_nodes([{'id': 0, 'label': 'Chunking', 'type': 'pattern'},
+                                    {'id': 1, 'label': 'Banana Bread', 'type': 'pattern'}])
+
+    report = resolver.report(nodes)
+
+    assert report['unresolved'] == [{'id': 1, 'label': 'Banana Bread', 'type': 'pattern'}]
+    assert report['fuzzy'] == []
+    assert report['orphaned'] == ['patterns/ground-rules']
+
+
+def test_map_variant_remaps_colors_on_a_copy_on_write_clone():
+    svg_ns = "{http://www.w3.org/2000/svg}"
+    root = ET.Element(f'{svg_ns}svg')
+    defs = ET.SubElement(root, f'{svg_ns}defs')
+    node = ET.SubElement(root, f'{svg_ns}g')
+    ET.SubElement(node, f'{svg_ns}path', {'fill': '#B2F2BB', 'stroke': '#1e1e1e'})
+    ET.SubElement(node, f'{svg_ns}text', {'style': 'fill: #1e1e1e; white-space: pre;'}).text = 'Chunking'
+    variant = MapVariant('dark', '_dark', {'#b2f2bb': '#1f4d2b', '#1e1e1e': '#e3e3e3'}, 'theme-dark')
+
+    dark = variant.apply(root)
+
+    assert dark.get('class') == 'theme-dark' and root.get('class') is None
+    assert dark[0] is defs
+    assert dark[1][0].attrib == {'fill': '#1f4d2b', 'stroke': '#e3e3e3'}
+    assert dark[1][1].get('style') == 'fill: #e3e3e3; white-space: pre;' and dark[1][1].text == 'Chunking'
+    assert root[1][0].get('fill') == '#B2F2BB'
@@ -1,10 +1,29 @@
 import sys
+import pytest
 from pathlib import Path
 
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root / "tools"))
+sys.path.insert(0, str(Path(__file__).parent))
 
-from process_map import save_semantic_map
+import gzip
+import json
+import os
+import shutil
+import xml.etree.ElementTree as ET
+
+import process_map
+from process_map import save_semantic_map, batch_jobs_from_globs, batch_jobs_from_manifest, run_batch, MapCache, OutputOptions
+from svg_fixtures import create_synthetic_map, create_minimal_svg, create_shape_group, create_text_group
+from benchmark_process_map import run_benchmarks
+from svg_canonical import describe_differences
+
+def assert_matches_golden(output_svg, golden_svg):
+    generated_svg = output_svg.read_bytes()
+    expected_svg = golden_svg.read_bytes()
+    if generated_svg != expected_svg:
+        pytest.fail("Generated SVG differs from golden file:\n" +
+                    describe_differences(ET.fromstring(expected_svg), ET.fromstring(generated_svg)))
 
 def test_process_map_output_matches_golden():
     input_svg = project_root / "website" / "app" / "talk" / "map.svg"
@@ -13,7 +32,578 @@ def test_process_map_output_matches_golden():
 
     save_semantic_map(str(input_svg), str(output_svg))
 
-    generated_svg = output_svg.read_text()
-    expected_svg = golden_svg.read_text()
+    assert_matches_golden(output_svg, golden_svg)
+
+
+def test_assignment_engine_output_matches_golden(tmp_path):
+    pytest.importorskip("numpy")
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    output_svg = tmp_path / "semantic_map.svg"
+    golden_svg = project_root / "tools" / "tests" / "golden" / "semantic_map.svg"
+
+    save_semantic_map(str(input_svg), str(output_svg), engine='assignment')
+
+    assert_matches_golden(output_svg, golden_svg)
+
+
+def test_streaming_output_matches_golden(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    output_svg = tmp_path / "semantic_map.svg"
+    golden_svg = project_root / "tools" / "tests" / "golden" / "semantic_map.svg"
+
+    save_semantic_map(str(input_svg), str(output_svg), streaming=True)
+
+    assert_matches_golden(output_svg, golden_svg)
+
+
+def test_batch_jobs_from_globs_name_outputs_after_inputs(tmp_path):
+    (tmp_path / "light.svg").write_text("<svg />")
+    (tmp_path / "dark.svg").write_text("<svg />")
+
+    jobs = batch_jobs_from_globs([str(tmp_path / "*.svg"), str(tmp_path / "light.svg")], tmp_path / "out")
+
+    assert jobs == [
+        (tmp_path / "dark.svg", tmp_path / "out" / "semantic_dark.svg"),
+        (tmp_path / "light.svg", tmp_path / "out" / "semantic_light.svg"),
+    ]
+
+
+def test_batch_rejects_inputs_that_map_to_the_same_output(tmp_path):
+    for talk in ("a", "b"):
+        (tmp_path / talk).mkdir()
+        (tmp_path / talk / "map.svg").write_text("<svg />")
+    jobs = batch_jobs_from_globs([str(tmp_path / "*" / "map.svg")], tmp_path / "out")
+
+    with pytest.raises(ValueError, match="semantic_map.svg"):
+        run_batch(jobs, max_workers=1)
+    assert not (tmp_path / "out").exists()
+
+
+def test_batch_jobs_from_manifest_resolves_paths_relative_to_manifest(tmp_path):
+    manifest = tmp_path / "maps.json"
+    manifest.write_text(json.dumps([
+        {"input": "talk.svg", "output": "public/talk_semantic.svg"},
+        {"input": "exports/dark.svg"},
+    ]))
+
+    jobs = batch_jobs_from_manifest(manifest, tmp_path / "out")
+
+    assert jobs == [
+        (tmp_path / "talk.svg", tmp_path / "public" / "talk_semantic.svg"),
+        (tmp_path / "exports" / "dark.svg", tmp_path / "out" / "semantic_dark.svg"),
+    ]
+
+
+def test_run_batch_converts_every_map_and_reports_failures(tmp_path):
+    input_svg = tmp_path / "map.svg"
+    shutil.copy(project_root / "website" / "app" / "talk" / "map.svg", input_svg)
+    golden_svg = project_root / "tools" / "tests" / "golden" / "semantic_map.svg"
+    jobs = [
+        (input_svg, tmp_path / "out" / "semantic_map.svg"),
+        (tmp_path / "missing.svg", tmp_path / "out" / "semantic_missing.svg"),
+    ]
+
+    results = run_batch(jobs, max_workers=2)
+
+    assert results[0].counts == (37, 5)
+    assert_matches_golden(tmp_path / "out" / "semantic_map.svg", golden_svg)
+    assert results[1].error is not None
+    assert "FAILED" in results[1].summary()
+
+
+def test_cached_conversion_skips_parsing_when_input_is_unchanged(tmp_path, monkeypatch):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    golden_svg = project_root / "tools" / "tests" / "golden" / "semantic_map.svg"
+    cache_dir = tmp_path / "cache"
+    first_output = tmp_path / "first.svg"
+    second_output = tmp_path / "second.svg"
+
+    first_counts = save_semantic_map(str(input_svg), str(first_output), cache_dir=cache_dir)
+    monkeypatch.setattr(process_map, "load_svg_tree", None)
+    second_counts = save_semantic_map(str(input_svg), str(second_output), cache_dir=cache_dir)
+
+    assert first_counts == second_counts == (37, 5)
+    assert_matches_golden(second_output, golden_svg)
+
+
+def test_map_cache_key_changes_with_input_and_engine():
+    cache = MapCache("unused")
+
+    key = cache.key_for(b"<svg />", "greedy")
+
+    assert key == cache.key_for(b"<svg />", "greedy")
+    assert key != cache.key_for(b"<svg></svg>", "greedy")
+    assert key != cache.key_for(b"<svg />", "assignment")
+
+
+def test_map_cache_evicts_least_recently_used_entries(tmp_path):
+    cache = MapCache(tmp_path, max_bytes=250)
+    index = {"legend": [], "interactive": []}
+
+    cache.store("old", b"x" * 100, index)
+    os.utime(tmp_path / "old.svg", (0, 0))
+    cache.store("new", b"y" * 100, index)
+
+    assert cache.load("old") is None
+    assert cache.load("new") == (b"y" * 100, index)
+
+
+def test_font_extraction_writes_shared_font_files_and_rewrites_urls(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    fonts_dir = tmp_path / "fonts"
+    options = OutputOptions(fonts_dir=fonts_dir, font_url_prefix="/maps/fonts/")
+
+    save_semantic_map(str(input_svg), str(tmp_path / "light.svg"), output_options=options)
+    save_semantic_map(str(input_svg), str(tmp_path / "dark.svg"), streaming=True, output_options=options)
+
+    font_files = sorted(path.name for path in fonts_dir.iterdir())
+    generated_svg = (tmp_path / "light.svg").read_text()
+    assert len(font_files) == 2
+    assert all(path.endswith(".woff2") for path in font_files)
+    assert "data:font/" not in generated_svg
+    for font_file in font_files:
+        assert f"url(/maps/fonts/{font_file})" in generated_svg
+    assert (tmp_path / "dark.svg").read_text() == generated_svg
+
+
+def test_negative_minify_precision_is_rejected(monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['process_map.py', '--minify', '-1'])
+
+    with pytest.raises(SystemExit):
+        process_map.parse_arguments()
+
+
+def test_extracted_fonts_default_to_a_root_relative_url(monkeypatch):
+    fonts_dir = project_root / "website" / "public" / "maps" / "fonts"
+    monkeypatch.setattr(sys, 'argv', ['process_map.py', '--extract-fonts', str(fonts_dir)])
+
+    options = process_map.output_options_from_arguments(process_map.parse_arguments())
+
+    assert options.font_url_prefix == "/maps/fonts/"
+
+
+def test_extracted_fonts_outside_the_public_dir_require_a_url_prefix(monkeypatch, tmp_path):
+    monkeypatch.setattr(sys, 'argv', ['process_map.py', '--extract-fonts', str(tmp_path / "fonts")])
+
+    with pytest.raises(SystemExit):
+        process_map.parse_arguments()
+
+
+def test_minification_reports_exact_bytes_saved(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    golden_svg = project_root / "tools" / "tests" / "golden" / "semantic_map.svg"
+    options = OutputOptions(precision=2)
+
+    index = process_map.convert_semantic_map(str(input_svg), str(tmp_path / "minified.svg"), output_options=options)
+    streamed_index = process_map.convert_semantic_map(str(input_svg), str(tmp_path / "streamed.svg"), streaming=True, output_options=options)
+
+    minified_size = (tmp_path / "minified.svg").stat().st_size
+    assert index['bytes_saved'] == golden_svg.stat().st_size - minified_size
+    assert streamed_index['bytes_saved'] == index['bytes_saved']
+    assert (tmp_path / "streamed.svg").read_bytes() == (tmp_path / "minified.svg").read_bytes()
+
+
+def test_streamed_node_index_matches_in_memory_node_index(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    options = OutputOptions(precision=2, node_index=True)
+
+    index = process_map.convert_semantic_map(str(input_svg), str(tmp_path / "in_memory.svg"), output_options=options)
+    streamed_index = process_map.convert_semantic_map(str(input_svg), str(tmp_path / "streamed.svg"), streaming=True, output_options=options)
+
+    assert streamed_index['nodes'] == index['nodes']
+
+
+def test_precompressed_siblings_decompress_to_the_output(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    golden_svg = project_root / "tools" / "tests" / "golden" / "semantic_map.svg"
+    output_svg = tmp_path / "semantic_map.svg"
+
+    save_semantic_map(str(input_svg), str(output_svg), output_options=OutputOptions(precompress=True))
+
+    assert_matches_golden(output_svg, golden_svg)
+    assert gzip.decompress((tmp_path / "semantic_map.svg.gz").read_bytes()) == output_svg.read_bytes()
+
+
+def test_streaming_precompression_matches_in_memory_precompression(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    options = OutputOptions(precompress=True)
+
+    save_semantic_map(str(input_svg), str(tmp_path / "in_memory.svg"), output_options=options)
+    save_semantic_map(str(input_svg), str(tmp_path / "streamed.svg"), streaming=True, output_options=options)
+
+    assert (tmp_path / "streamed.svg.gz").read_bytes() == (tmp_path / "in_memory.svg.gz").read_bytes()
+
+
+def test_brotli_sibling_decompresses_to_the_output(tmp_path):
+    brotli = pytest.importorskip("brotli")
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    output_svg = tmp_path / "semantic_map.svg"
+
+    save_semantic_map(str(input_svg), str(output_svg), output_options=OutputOptions(precompress=True))
+
+    assert brotli.decompress((tmp_path / "semantic_map.svg.br").read_bytes()) == output_svg.read_bytes()
+
+
+def test_synthetic_map_is_deterministic_for_a_seed():
+    first = ET.tostring(create_synthetic_map(50, seed=7))
+    second = ET.tostring(create_synthetic_map(50, seed=7))
+    other = ET.tostring(create_synthetic_map(50, seed=8))
+
+    assert first == second
+    assert first != other
+
+
+def test_synthetic_map_yields_one_interactive_element_per_node():
+    map_elements = process_map.identify_map_elements(create_synthetic_map(200, seed=3))
+
+    assert map_elements.interactive_count() == 200
+    assert map_elements.legend_count() == 4
+
+
+def test_benchmark_reports_timings_for_every_stage():
+    run = run_benchmarks([20, 40])
+
+    assert [result['nodes'] for result in run['results']] == [20, 40]
+    assert all(result['interactive'] == result['nodes'] for result in run['results'])
+    assert list(run['results'][0]['stages']) == ['parse', 'scan', 'identify_map_elements', 'restructure_svg', 'write']
+
+
+def test_profiling_records_every_pipeline_stage(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    golden_svg = project_root / "tools" / "tests" / "golden" / "semantic_map.svg"
+
+    with process_map.profiling() as profile:
+        save_semantic_map(str(input_svg), str(tmp_path / "semantic_map.svg"))
+
+    assert list(profile.stages) == ['parse', 'scan', 'identify', 'restructure', 'postprocess', 'write']
+    assert profile.stages['identify']['counters']['shapes'] == 42
+    assert profile.stages['identify']['counters']['distance_computations'] > 0
+    assert profile.counters['bytes_written'] == golden_svg.stat().st_size
+    assert all(stage['peak_memory_bytes'] > 0 for stage in profile.stages.values())
+
+
+def test_streaming_profile_counts_nested_stages_once_in_the_total(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    finished_stages = []
+    profile = process_map.PipelineProfile(trace_memory=False, on_stage=lambda name, seconds, record: finished_stages.append(name))
+
+    with process_map.profiling(profile):
+        save_semantic_map(str(input_svg), str(tmp_path / "semantic_map.svg"), streaming=True)
+
+    assert finished_stages[-3:] == ['stream', 'identify', 'write']
+    assert profile.stages['scan']['calls'] > 1
+    top_level_seconds = sum(profile.stages[name]['seconds'] for name in ('stream', 'identify', 'write'))
+    assert profile.total_seconds == pytest.approx(top_level_seconds)
+
+
+def test_run_profiled_writes_stage_profile_as_json(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    profile_path = tmp_path / "profile.json"
+
+    counts = process_map.run_profiled(lambda: save_semantic_map(str(input_svg), str(tmp_path / "semantic_map.svg")), profile_path)
+
+    assert counts == (37, 5)
+    assert json.loads(profile_path.read_text())['counters']['map_elements'] == 42
+
+
+def test_watcher_rebuilds_a_map_once_saves_settle(tmp_path):
+    input_svg = tmp_path / "map.svg"
+    output_svg = tmp_path / "out" / "semantic_map.svg"
+    shutil.copy(project_root / "website" / "app" / "talk" / "map.svg", input_svg)
+    now = [100.0]
+    watcher = process_map.MapWatcher([(input_svg, output_svg)], debounce=0.5, clock=lambda: now[0])
+
+    initial_results = watcher.poll()
+    input_svg.write_bytes(input_svg.read_bytes().replace(b"Cannot Learn", b"Cannot Unlearn"))
+    os.utime(input_svg, ns=(1, 1))
+    now[0] += 0.1
+    results_during_burst = watcher.poll()
+    now[0] += 0.5
+    results_after_quiet_period = watcher.poll()
+
+    assert [result.counts for result in initial_results] == [(37, 5)]
+    assert results_during_burst == []
+    assert len(results_after_quiet_period) == 1
+    assert 'data-label="Cannot Unlearn"' in output_svg.read_text()
+
+
+def test_watcher_skips_saves_that_leave_the_content_unchanged(tmp_path):
+    input_svg = tmp_path / "map.svg"
+    shutil.copy(project_root / "website" / "app" / "talk" / "map.svg", input_svg)
+    now = [100.0]
+    watcher = process_map.MapWatcher([(input_svg, tmp_path / "semantic_map.svg")], debounce=0.5, clock=lambda: now[0])
+
+    watcher.poll()
+    os.utime(input_svg, ns=(1, 1))
+    now[0] += 0.1
+    watcher.poll()
+    now[0] += 1.0
+
+    assert watcher.poll() == []
+
+
+def test_watcher_rematches_only_the_neighbourhood_of_an_edit(tmp_path):
+    input_svg = tmp_path / "map.svg"
+    root = create_synthetic_map(400, seed=5)
+    ET.ElementTree(root).write(input_svg)
+    now = [100.0]
+    watcher = process_map.MapWatcher([(input_svg, tmp_path / "semantic_map.svg")], debounce=0.5, clock=lambda: now[0])
+    watcher.poll()
+
+    label_group = root[2]
+    x, rest = label_group.get('transform')[len('translate('):].split(' ', 1)
+    label_group.set('transform', f"translate({float(x) + 90} {rest}")
+    ET.ElementTree(root).write(input_svg)
+    os.utime(input_svg, ns=(1, 1))
+    watcher.poll()
+    now[0] += 1.0
+    with process_map.profiling(process_map.PipelineProfile(trace_memory=False)) as profile:
+        results = watcher.poll()
+    process_map.convert_semantic_map(str(input_svg), str(tmp_path / "full.svg"))
+
+    assert len(results) == 1 and results[0].error is None
+    assert 0 < profile.counters['rematched_shapes'] < 10
+    assert (tmp_path / "semantic_map.svg").read_bytes() == (tmp_path / "full.svg").read_bytes()
+
+
+def test_incremental_rebuild_matches_full_rebuild_after_moving_a_label(tmp_path):
+    input_svg = tmp_path / "map.svg"
+    root = create_synthetic_map(400, seed=5)
+    ET.ElementTree(root).write(input_svg)
+    process_map.convert_semantic_map(str(input_svg), str(tmp_path / "incremental.svg"), incremental_dir=tmp_path / "state")
+
+    label_group = root[2]
+    x, rest = label_group.get('transform')[len('translate('):].split(' ', 1)
+    label_group.set('transform', f"translate({float(x) + 90} {rest}")
+    ET.ElementTree(root).write(input_svg)
+    with process_map.profiling(process_map.PipelineProfile(trace_memory=False)) as profile:
+        process_map.convert_semantic_map(str(input_svg), str(tmp_path / "incremental.svg"), incremental_dir=tmp_path / "state")
+    process_map.convert_semantic_map(str(input_svg), str(tmp_path / "full.svg"))
+
+    assert (tmp_path / "incremental.svg").read_bytes() == (tmp_path / "full.svg").read_bytes()
+    assert 0 < profile.counters['rematched_shapes'] < 10
+
+
+def test_incremental_matcher_reuses_every_match_for_an_unchanged_map(tmp_path):
+    root = create_synthetic_map(100, seed=1)
+    state_path = tmp_path / "state.json"
+    first = process_map.IncrementalMatcher(state_path)
+    first_elements = first.identify(process_map.scan_svg(root))
+    first.save()
+
+    second = process_map.IncrementalMatcher(state_path)
+    second_elements = second.identify(process_map.scan_svg(root))
+
+    assert first.rematched_shapes == 104
+    assert second.rematched_shapes == 0
+    assert [element.name for element in second_elements.interactive] == [element.name for element in first_elements.interactive]
+
+
+def test_incremental_state_is_ignored_when_the_engine_changes(tmp_path):
+    pytest.importorskip("numpy")
+    root = create_synthetic_map(50, seed=2)
+    state_path = tmp_path / "state.json"
+    greedy = process_map.IncrementalMatcher(state_path, 'greedy')
+    greedy.identify(process_map.scan_svg(root))
+    greedy.save()
+
+    assignment = process_map.IncrementalMatcher(state_path, 'assignment')
+    assignment.identify(process_map.scan_svg(root))
+
+    assert assignment.rematched_shapes == 54
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_lxml_backend_output_matches_golden(tmp_path, streaming):
+    pytest.importorskip("lxml")
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    output_svg = tmp_path / "semantic_map.svg"
+    golden_svg = project_root / "tools" / "tests" / "golden" / "semantic_map.svg"
+
+    save_semantic_map(str(input_svg), str(output_svg), streaming=streaming, xml_backend_name='lxml')
+
+    assert_matches_golden(output_svg, golden_svg)
+
+
+def test_xml_backends_agree_on_namespaces_comments_and_escaped_characters(tmp_path):
+    pytest.importorskip("lxml")
+    input_svg = tmp_path / "map.svg"
+    input_svg.write_text(
+        '<?xml version="1.0"?>\n<!-- exported -->\n'
+        '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" viewBox="0 0 100 100">\n'
+        '  <?editor state?>\n  <rect x="0" y="0" width="100" height="100" fill="#ffffff"></rect>\n'
+        '  <g stroke-linecap="round" transform="translate(10 10)" data-note="a&#9;b &gt; c"><path fill="#b2f2bb" d="M0 0"/></g>\n'
+        '  <g transform="translate(12 12)"><text x="1" y="2">Tab&#9;Name &amp; CR&#13;</text></g>\n'
+        '  <g><desc></desc><image xlink:href="logo.png"/></g>\n</svg>\n')
+
+    for backend in ('stdlib', 'lxml'):
+        process_map.convert_semantic_map(str(input_svg), str(tmp_path / f"{backend}.svg"), xml_backend_name=backend)
+        process_map.convert_semantic_map(str(input_svg), str(tmp_path / f"{backend}_streamed.svg"), streaming=True, xml_backend_name=backend)
+
+    expected = (tmp_path / "stdlib.svg").read_bytes()
+    assert (tmp_path / "lxml.svg").read_bytes() == expected
+    assert (tmp_path / "stdlib_streamed.svg").read_bytes() == expected
+    assert (tmp_path / "lxml_streamed.svg").read_bytes() == expected
+
+
+def test_xml_backends_agree_on_svg_only_documents(tmp_path):
+    pytest.importorskip("lxml")
+    input_svg = tmp_path / "map.svg"
+    input_svg.write_text(
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">\n'
+        '  <rect x="0" y="0" width="100" height="100" fill="#ffffff"/>\n'
+        '  <g stroke-linecap="round" transform="translate(10 10)" data-note="tab&#9;quote&quot;"><path fill="#b2f2bb" d="M0 0"/></g>\n'
+        '  <g transform="translate(12 12)"><text x="1" y="2">Closes /&gt; and &lt;opens</text></g>\n'
+        '  <g><desc/></g>\n</svg>\n')
+
+    for backend in ('stdlib', 'lxml'):
+        process_map.convert_semantic_map(str(input_svg), str(tmp_path / f"{backend}.svg"), xml_backend_name=backend)
+
+    output = (tmp_path / "lxml.svg").read_bytes()
+    assert output == (tmp_path / "stdlib.svg").read_bytes()
+    assert b'data-note="tab&#09;quote&quot;"' in output
+    assert b'<desc />' in output and b'Closes /&gt; and &lt;opens' in output
+
+
+def test_stdlib_backend_is_the_default_and_lxml_is_opt_in():
+    pytest.importorskip("lxml")
+
+    assert process_map.xml_backend().name == 'stdlib'
+    assert process_map.xml_backend('lxml').name == 'lxml'
+
+
+def test_node_index_sidecar_agrees_with_the_hand_maintained_map_index(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    map_index = json.loads((project_root / "website" / "public" / "maps" / "map-index.json").read_text())
+    options = OutputOptions(node_index=True)
+
+    save_semantic_map(str(input_svg), str(tmp_path / "semantic_map.svg"), output_options=options)
+
+    nodes = json.loads((tmp_path / "semantic_map.nodes.json").read_text())['nodes']
+    assert [node['id'] for node in nodes] == list(range(37))
+    groups = [group for group in ET.parse(tmp_path / "semantic_map.svg").getroot().iter('{http://www.w3.org/2000/svg}g')
+              if group.get('class') == 'interactive-node']
+    assert [(int(group.get('data-node-id')), group.get('data-label')) for group in groups] == [(node['id'], node['label']) for node in nodes]
+    assert all(node['slug'] for node in nodes)
+    assert all(map_index[node['number']]['slug'] == node['slug'] for node in nodes if node['number'])
+    assert all(width > 0 and height > 0 for _, _, width, height in (node['bbox'] for node in nodes))
+
+    report = json.loads((tmp_path / "semantic_map.resolution.json").read_text())
+    assert report['unresolved'] == [] and report['fuzzy'] == []
+    assert not {f"{node['category']}/{node['slug']}" for node in nodes} & set(report['orphaned'])
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+@pytest.mark.parametrize("backend", ["stdlib", "lxml"])
+def test_nested_nodes_render_where_the_node_index_places_them(tmp_path, streaming, backend):
+    if backend == 'lxml':
+        pytest.importorskip("lxml")
+    root = create_minimal_svg()
+    root.set('transform', 'translate(5 7)')
+    nested = ET.SubElement(root, '{http://www.w3.org/2000/svg}g', {'transform': 'translate(1000 0)'})
+    inner = ET.SubElement(nested, '{http://www.w3.org/2000/svg}g', {'transform': 'scale(2)'})
+    inner.append(create_shape_group(50, 60, '#b2f2bb'))
+    inner.append(create_text_group(55, 65, 'Nested Pattern'))
+    input_svg = tmp_path / "map.svg"
+    ET.ElementTree(root).write(input_svg)
+    output_svg = tmp_path / "semantic_map.svg"
+
+    index = process_map.convert_semantic_map(str(input_svg), str(output_svg), streaming=streaming,
+                                             output_options=OutputOptions(node_index=True), xml_backend_name=backend)
+
+    output_root = ET.parse(output_svg).getroot()
+    root_matrix = process_map.parse_transform(output_root.get('transform', ''))
+    groups = {group.get('data-label'): group for group in output_root.iter('{http://www.w3.org/2000/svg}g')
+              if group.get('class') == 'interactive-node'}
+    node = next(node for node in index['nodes'] if node['label'] == 'Nested Pattern')
+    min_x, min_y, max_x, max_y = process_map.points_bounds(process_map.element_points(groups['Nested Pattern'][0], root_matrix))
+    assert node['bbox'] == pytest.approx([min_x, min_y, max_x - min_x, max_y - min_y], abs=0.01)
+    assert min_x > 1000
+
+
+def test_node_index_sidecar_is_written_on_cache_hits(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    options = OutputOptions(node_index=True)
+    save_semantic_map(str(input_svg), str(tmp_path / "first.svg"), cache_dir=tmp_path / "cache", output_options=options)
+
+    save_semantic_map(str(input_svg), str(tmp_path / "second.svg"), cache_dir=tmp_path / "cache", output_options=options)
+
+    assert (tmp_path / "second.nodes.json").read_bytes() == (tmp_path / "first.nodes.json").read_bytes()
+
+
+def test_tiles_split_the_map_into_outline_and_full_detail_levels(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    options = OutputOptions(tile_levels=3)
+
+    save_semantic_map(str(input_svg), str(tmp_path / "semantic_map.svg"), output_options=options)
+
+    tiles_dir = tmp_path / "semantic_map.tiles"
+    manifest = json.loads((tiles_dir / "manifest.json").read_text())
+    assert [level['detail'] for level in manifest['levels']] == ['outline', 'outline', 'full']
+    assert len(manifest['levels'][0]['tiles']) == 1
+    assert ET.parse(tiles_dir / "base.svg").getroot().find('.//{http://www.w3.org/2000/svg}style') is not None
+
+    overview = ET.parse(tiles_dir / "0" / "0_0.svg").getroot()
+    assert len(overview.findall(".//{http://www.w3.org/2000/svg}g[@class='interactive-node']")) == 37
+    assert overview.find(".//{http://www.w3.org/2000/svg}g[@class='interactive-node']//{http://www.w3.org/2000/svg}text") is None
+
+    full_detail_texts = set()
+    for tile in manifest['levels'][-1]['tiles']:
+        tile_root = ET.parse(tiles_dir / tile['path']).getroot()
+        full_detail_texts.update(text.text for text in tile_root.iter('{http://www.w3.org/2000/svg}text'))
+    output_texts = {text.text for text in ET.parse(tmp_path / "semantic_map.svg").getroot().iter('{http://www.w3.org/2000/svg}text')}
+    assert full_detail_texts == output_texts
+
+
+def test_palette_config_retypes_nodes_and_changes_the_cache_key(tmp_path):
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    palette_path = tmp_path / "palette.json"
+    palette_path.write_text(json.dumps({'max_distance': 15, 'node_types': {'pattern': ['#b2f2bb', '#ffc9c9', '#ffec99'], 'pitstop': ['#a5d8ff']}}))
+    options = OutputOptions(palette_path=palette_path)
+
+    save_semantic_map(str(input_svg), str(tmp_path / "semantic_map.svg"), output_options=options)
+
+    colors = {group.get('data-color') for group in ET.parse(tmp_path / "semantic_map.svg").getroot().iter('{http://www.w3.org/2000/svg}g')
+              if group.get('class') == 'interactive-node'}
+    assert colors == {'pattern'}
+    assert MapCache("unused").key_for(b"<svg />", "greedy", options) != MapCache("unused").key_for(b"<svg />", "greedy")
+
+
+def test_edited_palette_and_variants_files_are_reloaded(tmp_path):
+    palette_path = tmp_path / "palette.json"
+    variants_path = tmp_path / "variants.json"
+    palette_path.write_text(json.dumps({'node_types': {'pattern': ['#b2f2bb']}}))
+    variants_path.write_text(json.dumps({'dark': {'colors': {'#ffffff': '#000000'}}}))
+    first_palette, first_variants = process_map.load_palette(palette_path), process_map.load_variants(variants_path)
+
+    palette_path.write_text(json.dumps({'node_types': {'obstacle': ['#b2f2bb']}}))
+    variants_path.write_text(json.dumps({'dim': {'colors': {'#ffffff': '#333333'}}}))
+    os.utime(palette_path, ns=(1, 1))
+    os.utime(variants_path, ns=(1, 1))
+
+    assert process_map.load_palette(palette_path) is not first_palette
+    assert process_map.load_palette(palette_path).classify('#b2f2bb') == 'obstacle'
+    assert [variant.name for variant in first_variants] == ['dark']
+    assert [variant.name for variant in process_map.load_variants(variants_path)] == ['dim']
+
+
+@pytest.mark.parametrize("backend", ["stdlib", "lxml"])
+def test_variants_are_written_from_one_conversion_and_on_cache_hits(tmp_path, backend):
+    if backend == 'lxml':
+        pytest.importorskip("lxml")
+    input_svg = project_root / "website" / "app" / "talk" / "map.svg"
+    golden_svg = project_root / "tools" / "tests" / "golden" / "semantic_map.svg"
+    options = OutputOptions(variants_path=process_map.DEFAULT_VARIANTS_PATH)
+
+    save_semantic_map(str(input_svg), str(tmp_path / "first.svg"), cache_dir=tmp_path / "cache", output_options=options,
+                      xml_backend_name=backend)
+    save_semantic_map(str(input_svg), str(tmp_path / "second.svg"), cache_dir=tmp_path / "cache", output_options=options,
+                      xml_backend_name=backend)
 
-    assert generated_svg == expected_svg, "Generated SVG differs from golden file"
+    assert_matches_golden(tmp_path / "first.svg", golden_svg)
+    dark = (tmp_path / "first_dark.svg").read_bytes()
+    assert dark == (tmp_path / "second_dark.svg").read_bytes()
+    dark_root = ET.fromstring(dark)
+    assert dark_root.get('class') == 'theme-dark'
+    assert b'#1e1e1e' not in dark and b'#e3e3e3' in dark
+    assert len(dark_root.findall(".//{http://www.w3.org/2000/svg}g[@class='interactive-node']")) == 37
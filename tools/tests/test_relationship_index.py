@@ -0,0 +1,75 @@
+import sys
+import pytest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "tools"))
+
+import subprocess
+
+from relationship_index import parse_relationships, compile_relationship_index, validate_relationship_index, build_relationship_index, document_slugs
+
+GRAPH = """graph LR
+  %% comment
+  patterns/chunking -->|solves| obstacles/limited-focus
+  patterns/focused-agent -->|solves| obstacles/limited-focus
+  patterns/chunking <-->|related| patterns/focused-agent
+"""
+SLUGS = ['obstacles/limited-focus', 'patterns/chunking', 'patterns/focused-agent']
+
+def test_bidirectional_edges_are_expanded_in_both_directions():
+    relationships = parse_relationships(GRAPH)
+
+    assert [(r.source, r.target, r.type, r.bidirectional) for r in relationships] == [
+        ('patterns/chunking', 'obstacles/limited-focus', 'solves', False),
+        ('patterns/focused-agent', 'obstacles/limited-focus', 'solves', False),
+        ('patterns/chunking', 'patterns/focused-agent', 'related', True),
+        ('patterns/focused-agent', 'patterns/chunking', 'related', True),
+    ]
+    assert relationships[-1].line_number == 5
+
+
+def test_malformed_lines_and_unknown_types_are_rejected():
+    with pytest.raises(ValueError, match="line 2"):
+        parse_relationships("graph LR\n  patterns/a --> patterns/b\n")
+    with pytest.raises(ValueError, match="Invalid relationship type"):
+        parse_relationships("patterns/a -->|fixes| patterns/b\n")
+
+
+def test_index_precomputes_adjacency_reverse_edges_degrees_and_lookups():
+    index = compile_relationship_index(GRAPH, SLUGS)
+
+    assert index['outgoing']['patterns/chunking'] == {'solves': ['obstacles/limited-focus'], 'related': ['patterns/focused-agent']}
+    assert index['incoming']['obstacles/limited-focus'] == {'solves': ['patterns/chunking', 'patterns/focused-agent']}
+    assert index['degree']['obstacles/limited-focus'] == {'out': 0, 'in': 2}
+    assert index['solved_by']['obstacles/limited-focus'] == ['patterns/chunking', 'patterns/focused-agent']
+    assert index['related']['patterns/focused-agent'] == ['obstacles/limited-focus', 'patterns/chunking']
+    assert validate_relationship_index(index) == []
+
+
+def test_validation_reports_each_unknown_endpoint_once():
+    index = compile_relationship_index(GRAPH + "  patterns/chunking -->|uses| patterns/missing\n", SLUGS[:2])
+
+    assert validate_relationship_index(index) == [('invalid-source', 'patterns/focused-agent', 4),
+                                                  ('invalid-target', 'patterns/focused-agent', 5),
+                                                  ('invalid-target', 'patterns/missing', 6)]
+
+
+def test_repository_relationships_are_valid():
+    index = build_relationship_index()
+
+    assert validate_relationship_index(index) == []
+    assert len(index['documents']) == len(document_slugs(project_root / "documents"))
+
+
+def test_check_mode_fails_on_unknown_slugs(tmp_path):
+    (tmp_path / "patterns").mkdir()
+    (tmp_path / "patterns" / "chunking.md").write_text("# Chunking\n")
+    (tmp_path / "relationships.mmd").write_text("graph LR\n  patterns/chunking -->|solves| obstacles/missing\n")
+
+    result = subprocess.run([sys.executable, str(project_root / "tools" / "relationship_index.py"), '--check',
+                             '--documents-dir', str(tmp_path)], capture_output=True, text=True)
+
+    assert result.returncode == 1
+    assert 'invalid-target: "obstacles/missing" (line 2)' in result.stderr
+    assert not (tmp_path / "relationships.index.json").exists()
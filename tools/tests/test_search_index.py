@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "tools"))
+
+from search_index import tokenize, split_front_matter, read_documents, build_search_index, search, prefix_term_ids
+
+def write_document(documents_dir, slug, markdown):
+    path = documents_dir / f"{slug}.md"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(markdown, encoding='utf-8')
+
+def create_corpus(documents_dir):
+    write_document(documents_dir, "patterns/chunking", "---\nauthors: [someone]\n---\n\n# Chunking\n\nDelegate execution to focused subagents.\n")
+    write_document(documents_dir, "patterns/context-management", "# Context Management\n\nKeep the context window small.\n")
+    write_document(documents_dir, "obstacles/limited-context-window", "# 🪟 Limited Context Window (Obstacle)\n\nThe window fills up.\n")
+    return build_search_index(read_documents(documents_dir, workers=2))
+
+
+def test_tokenize_lowercases_and_drops_markup_and_single_characters():
+    assert tokenize("**Key insight**: Delegate a `Task` to sub-agents!") == ['key', 'insight', 'delegate', 'task', 'to', 'sub', 'agents']
+
+
+def test_front_matter_is_split_from_the_body():
+    front_matter, body = split_front_matter("---\nauthors: [someone]\ntitle: Chunking\n---\n# Heading\n")
+
+    assert front_matter == {'authors': '[someone]', 'title': 'Chunking'}
+    assert body == "# Heading\n"
+
+
+def test_index_keeps_documents_in_category_order_with_clean_titles(tmp_path):
+    index = create_corpus(tmp_path)
+
+    assert index['documents'] == [['patterns/chunking', 'Chunking', 'patterns'],
+                                  ['patterns/context-management', 'Context Management', 'patterns'],
+                                  ['obstacles/limited-context-window', 'Limited Context Window', 'obstacles']]
+    assert 'authors' not in index['terms'] and 'someone' not in index['terms']
+
+
+def test_search_covers_bodies_and_ranks_title_matches_first(tmp_path):
+    index = create_corpus(tmp_path)
+
+    assert search(index, "window") == ['obstacles/limited-context-window', 'patterns/context-management']
+    assert search(index, "subagents") == ['patterns/chunking']
+
+
+def test_last_query_token_matches_as_a_prefix(tmp_path):
+    index = create_corpus(tmp_path)
+
+    assert [index['terms'][term_id] for term_id in prefix_term_ids(index, "con")] == ['context']
+    assert [index['terms'][term_id] for term_id in prefix_term_ids(index, "co")] == ['context']
+    assert min(len(prefix) for prefix in index['prefixes']) == 2
+    assert search(index, "context win") == ['obstacles/limited-context-window', 'patterns/context-management']
+    assert search(index, "manag") == ['patterns/context-management']
+
+
+def test_misspelled_terms_fall_back_to_trigram_matches(tmp_path):
+    index = create_corpus(tmp_path)
+
+    assert search(index, "chunkng delegate") == ['patterns/chunking']
+    assert search(index, "zzzz") == []
+
+
+def test_repository_documents_are_searchable_by_title_and_body():
+    index = build_search_index(read_documents(project_root / "documents"))
+
+    assert search(index, "hallucinations")[0] == 'obstacles/hallucinations'
+    assert 'patterns/chunking' in search(index, "subagents")
@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "tools"))
+
+import xml.etree.ElementTree as ET
+
+from svg_canonical import SubtreeHashes, subtree_hash, canonical_text, diff_subtrees, describe_differences
+
+def parse(svg):
+    return ET.fromstring(f'<svg xmlns="http://www.w3.org/2000/svg">{svg}</svg>')
+
+
+def test_canonical_text_normalizes_numbers_but_not_colors():
+    assert canonical_text(' translate(10.50 -0.0000001)  rotate(0 26.70 26.2) ') == 'translate(10.5 0) rotate(0 26.7 26.2)'
+    assert canonical_text('#1e1e1e') == '#1e1e1e'
+    assert canonical_text('#123456 url(#a10)') == '#123456 url(#a10)'
+    assert canonical_text('M10.50 2L.50-3.0') == 'M10.5 2L0.5-3'
+
+
+def test_hash_ignores_attribute_order_number_formatting_and_whitespace():
+    first = parse('<g b="1.50" a="2"><path d="M 0.0 1" /> </g>')
+    second = parse('<g a="2.000" b="1.5"><path d="M 0 1.0000001" /></g>')
+
+    assert subtree_hash(first) == subtree_hash(second)
+    assert subtree_hash(first) != subtree_hash(parse('<g a="2" b="1.5"><path d="M 0 2" /></g>'))
+
+
+def test_hash_ignores_number_formatting_right_after_path_commands():
+    first = parse('<path d="M10.50 2" />')
+    second = parse('<path d="M10.5 2" />')
+
+    assert subtree_hash(first) == subtree_hash(second)
+    assert subtree_hash(first) != subtree_hash(parse('<path d="M10.6 2" />'))
+
+
+def test_unchanged_subtrees_keep_their_hashes():
+    first = parse('<g id="a"><path d="M 0 1" /></g><g id="b"><text>One</text></g>')
+    second = parse('<g id="a"><path d="M 0 1" /></g><g id="b"><text>Two</text></g>')
+    first_hashes, second_hashes = SubtreeHashes(first), SubtreeHashes(second)
+
+    assert first_hashes[first[0]] == second_hashes[second[0]]
+    assert first_hashes[first[1]] != second_hashes[second[1]]
+
+
+def test_diff_descends_only_into_changed_subtrees():
+    expected = parse('<g data-label="Chunking"><path fill="#b2f2bb" /><text>Chunking</text></g><g><path /></g>')
+    actual = parse('<g data-label="Chunking"><path fill="#ffc9c9" /><text>Chunking</text></g><g><path /><path /></g>')
+
+    assert diff_subtrees(expected, actual) == [
+        "svg/g[0][@data-label='Chunking']/path[0]: @fill '#b2f2bb' != '#ffc9c9'",
+        "svg/g[1]: 1 children != 2",
+    ]
+
+
+def test_equal_trees_report_a_serialization_only_difference():
+    assert describe_differences(parse('<g a="1" />'), parse('<g a="1.0" />')).endswith("serialization only")
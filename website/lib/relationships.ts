@@ -1,3 +1,4 @@
+import { createHash } from 'crypto'
 import fs from 'fs'
 import path from 'path'
 import {
@@ -19,6 +20,34 @@ function readRelationshipsFile(): string {
   return fs.readFileSync(relationshipsPath, 'utf8')
 }
 
+// Prebuilt by tools/relationship_index.py; only trusted while it matches relationships.mmd
+function readPrebuiltRelationships(content: string): Relationship[] | null {
+  const indexPath = path.join(
+    process.cwd(),
+    '..',
+    'documents',
+    'relationships.index.json'
+  )
+  if (!fs.existsSync(indexPath)) {
+    return null
+  }
+
+  const index = JSON.parse(fs.readFileSync(indexPath, 'utf8'))
+  const sourceHash = createHash('sha256').update(content).digest('hex')
+  if (index.source_sha256 !== sourceHash) {
+    return null
+  }
+
+  return index.relationships.map(
+    ([from, to, type, bidirectional]: [string, string, RelationshipType, boolean]) => ({
+      from,
+      to,
+      type,
+      bidirectional,
+    })
+  )
+}
+
 function parseRelationshipType(typeString: string): RelationshipType {
   const validTypes: RelationshipType[] = [
     'related',
@@ -118,7 +147,8 @@ function buildRelationshipGraph(): RelationshipGraph {
   }
 
   const content = readRelationshipsFile()
-  const relationships = parseRelationships(content)
+  const relationships =
+    readPrebuiltRelationships(content) ?? parseRelationships(content)
 
   cachedGraph = { relationships }
   return cachedGraph
@@ -1,3 +1,4 @@
+import { createHash } from 'crypto'
 import { RelationshipType } from '@/lib/types'
 
 // Must be before any imports that use these modules
@@ -595,4 +596,49 @@ patterns/chain-of-small-steps -->|uses| patterns/show-me`
       expect(chainRels).toHaveLength(2)
     })
   })
+
+  describe('Prebuilt Relationship Index', () => {
+    const content = `graph TD
+patterns/active-partner -->|solves| obstacles/black-box-ai`
+
+    it('should load relationships from the index when its source hash matches', () => {
+      const index = {
+        source_sha256: createHash('sha256').update(content).digest('hex'),
+        relationships: [['patterns/active-partner', 'patterns/indexed-target', 'related', true, 2]],
+      }
+
+      mockedFs.existsSync.mockReturnValue(true)
+      mockedFs.readFileSync
+        .mockReturnValueOnce(content)
+        .mockReturnValueOnce(JSON.stringify(index))
+
+      const result = relationships.getRelationshipsFor('active-partner', 'patterns')
+
+      expect(result).toEqual([
+        {
+          from: 'patterns/active-partner',
+          to: 'patterns/indexed-target',
+          type: 'related',
+          bidirectional: true,
+        },
+      ])
+    })
+
+    it('should reparse relationships.mmd when the index is stale', () => {
+      const index = {
+        source_sha256: 'stale',
+        relationships: [['patterns/active-partner', 'patterns/indexed-target', 'related', true, 2]],
+      }
+
+      mockedFs.existsSync.mockReturnValue(true)
+      mockedFs.readFileSync
+        .mockReturnValueOnce(content)
+        .mockReturnValueOnce(JSON.stringify(index))
+
+      const result = relationships.getRelationshipsFor('active-partner', 'patterns')
+
+      expect(result).toHaveLength(1)
+      expect(result[0].to).toBe('obstacles/black-box-ai')
+    })
+  })
 })